@@ -85,7 +85,9 @@ class BankClassifier:
         text = self._extract_first_page(pdf_path)
         
         if not text:
-            # Fallback: Check filename
+            # Fallback: Check filename (file objects may carry a `name`)
+            if hasattr(pdf_path, 'read'):
+                pdf_path = getattr(pdf_path, 'name', '') or ''
             filename = Path(pdf_path).name.upper()
             
             if 'BNI' in filename:
@@ -13,14 +13,18 @@ Usage:
     df = parser.to_dataframe()
 """
 
+import csv
+import logging
 from pathlib import Path
-from typing import List, Dict, Type, Optional
+from typing import List, Dict, Iterator, Type, Optional
 import pandas as pd
 
 from src.classifier import BankClassifier
 from src.parsers.base import BaseBankParser
 from src.models.transaction import Transaction
 
+log = logging.getLogger(__name__)
+
 
 class Parser:
     """
@@ -38,6 +42,10 @@ class Parser:
         # Parse multiple files
         all_transactions = parser.parse_directory("./statements/")
         
+        # Stream large directories without keeping every transaction
+        for txn in parser.iter_transactions("./statements/"):
+            ...
+        
         # Export
         parser.export_csv("output.csv")
     """
@@ -80,14 +88,19 @@ class Parser:
         
         Automatically identifies the bank and uses the correct parser.
         """
+        transactions = self._parse_file(pdf_path)
+        self.transactions.extend(transactions)
+        return transactions
+    
+    def _parse_file(self, pdf_path: str) -> List[Transaction]:
+        """Classify and parse one PDF without storing the result."""
         path = Path(pdf_path)
         if not path.exists():
             raise FileNotFoundError(f"File not found: {pdf_path}")
         
         # Classify the PDF
         bank_code, confidence = self.classifier.identify_with_confidence(pdf_path)
-        print(f"📄 {path.name}")
-        print(f"   Bank: {bank_code.upper()} (confidence: {confidence:.0%})")
+        log.info("📄 %s - bank: %s (confidence: %.0f%%)", path.name, bank_code.upper(), confidence * 100)
         
         # Get the parser
         if bank_code not in self.parsers:
@@ -96,34 +109,79 @@ class Parser:
         parser_class = self.parsers[bank_code]
         parser = parser_class()
         
-        # Parse and store
         transactions = parser.parse(pdf_path)
-        self.transactions.extend(transactions)
         
-        print(f"   Extracted: {len(transactions)} transactions")
+        log.info("   Extracted: %d transactions", len(transactions))
         return transactions
     
-    def parse_directory(self, directory: str) -> List[Transaction]:
-        """
-        Parse all PDFs in a directory.
-        """
+    def _find_pdfs(self, directory: str) -> List[Path]:
+        """List PDFs in a directory, sorted by name."""
         path = Path(directory)
         if not path.is_dir():
             raise ValueError(f"Not a directory: {directory}")
         
         pdf_files = list(path.glob("*.pdf")) + list(path.glob("*.PDF"))
+        return sorted(pdf_files)
+    
+    def parse_directory(self, directory: str) -> List[Transaction]:
+        """
+        Parse all PDFs in a directory.
+        """
+        pdf_files = self._find_pdfs(directory)
         
-        print(f"Found {len(pdf_files)} PDF files\n")
+        log.info("Found %d PDF files", len(pdf_files))
         
-        for pdf_file in sorted(pdf_files):
+        for pdf_file in pdf_files:
             try:
                 self.parse(str(pdf_file))
             except Exception as e:
-                print(f"   ❌ Error: {e}")
+                log.error("❌ Error parsing %s: %s", pdf_file.name, e)
         
-        print(f"\n✅ Total: {len(self.transactions)} transactions extracted")
+        log.info("✅ Total: %d transactions extracted", len(self.transactions))
         return self.transactions
     
+    def iter_transactions(self, directory: str) -> Iterator[Transaction]:
+        """
+        Yield transactions file by file from all PDFs in a directory.
+        
+        Unlike parse_directory, nothing is kept in self.transactions,
+        so memory stays bounded by the largest single statement.
+        """
+        for pdf_file in self._find_pdfs(directory):
+            try:
+                transactions = self._parse_file(str(pdf_file))
+            except Exception as e:
+                log.error("❌ Error parsing %s: %s", pdf_file.name, e)
+                continue
+            yield from transactions
+    
+    def stream_to_csv(self, directory: str, output_path: str) -> str:
+        """
+        Parse a directory straight into a CSV file.
+        
+        Rows are written (and flushed) per file instead of building
+        a DataFrame of every transaction first.
+        """
+        with open(output_path, "w", newline="", encoding="utf-8") as f:
+            writer = None
+            for pdf_file in self._find_pdfs(directory):
+                try:
+                    transactions = self._parse_file(str(pdf_file))
+                except Exception as e:
+                    log.error("❌ Error parsing %s: %s", pdf_file.name, e)
+                    continue
+                
+                for txn in transactions:
+                    row = txn.to_dict()
+                    if writer is None:
+                        writer = csv.DictWriter(f, fieldnames=list(row))
+                        writer.writeheader()
+                    writer.writerow(row)
+                f.flush()
+        
+        log.info("📁 Exported to: %s", output_path)
+        return output_path
+    
     def to_dataframe(self) -> pd.DataFrame:
         """Convert all transactions to DataFrame."""
         if not self.transactions:
@@ -138,7 +196,7 @@ class Parser:
         """Export all transactions to CSV."""
         df = self.to_dataframe()
         df.to_csv(output_path, index=False)
-        print(f"📁 Exported to: {output_path}")
+        log.info("📁 Exported to: %s", output_path)
         return output_path
     
     def clear(self):
@@ -7,11 +7,17 @@ Focus: Extract → Store → Summarize later
 
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import List, Optional
+from typing import BinaryIO, List, Optional, Union
 import pandas as pd
 
 from src.models.transaction import Transaction, AccountInfo, TransactionType
 
+# Month abbreviation -> number, shared by the parsers' fast date paths
+# (a dict lookup instead of strptime for every row)
+MONTHS = {m: i + 1 for i, m in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+)}
+
 
 class BaseBankParser(ABC):
     """
@@ -47,7 +53,7 @@ class BaseBankParser(ABC):
         Extract transactions from a PDF file.
         
         Args:
-            pdf_path: Path to the PDF file
+            pdf_path: Path to the PDF file, or a binary file object
             
         Returns:
             List of Transaction objects
@@ -60,7 +66,7 @@ class BaseBankParser(ABC):
         Extract account information from the PDF header.
         
         Args:
-            pdf_path: Path to the PDF file
+            pdf_path: Path to the PDF file, or a binary file object
             
         Returns:
             AccountInfo object
@@ -69,13 +75,19 @@ class BaseBankParser(ABC):
     
     # ==================== SHARED METHODS ====================
     
-    def parse(self, pdf_path: str) -> List[Transaction]:
+    def parse(self, pdf_path: Union[str, BinaryIO]) -> List[Transaction]:
         """
         Main entry point - parse a PDF and return transactions.
+        
+        Accepts a path or an in-memory binary file object (e.g. io.BytesIO
+        with a `name` attribute, used as the source file name).
         """
-        path = Path(pdf_path)
-        if not path.exists():
-            raise FileNotFoundError(f"PDF not found: {pdf_path}")
+        if hasattr(pdf_path, 'read'):
+            path = Path(getattr(pdf_path, 'name', '') or '')
+        else:
+            path = Path(pdf_path)
+            if not path.exists():
+                raise FileNotFoundError(f"PDF not found: {pdf_path}")
         
         # Extract data
         self.account_info = self.extract_account_info(pdf_path)
@@ -5,15 +5,33 @@ Wraps the existing parsers/bni_parser.py to match the BaseBankParser interface.
 """
 
 from typing import List, Optional
-from datetime import datetime
-import pandas as pd
+from datetime import date, datetime
 from pathlib import Path
+import numpy as np
 
-from src.parsers.base import BaseBankParser
+from src.parsers.base import BaseBankParser, MONTHS
 from src.models.transaction import (
     Transaction, AccountInfo, TransactionType, TransactionCategory
 )
-from src.parsers.bni_impl import extract_transactions_from_bni, extract_account_info_bni
+from src.parsers.bni_impl import extract_transaction_columns_bni, extract_account_info_bni
+
+# Indexed by the is-debit flag
+_TXN_TYPES = (TransactionType.CREDIT, TransactionType.DEBIT)
+
+
+def _parse_date(date_str: str) -> Optional[date]:
+    """Parse '01 Apr 2025' into a date, or None if it isn't in that format."""
+    try:
+        d, mo, y = date_str.split()
+        return date(int(y), MONTHS[mo], int(d))
+    except (KeyError, ValueError):
+        pass
+    # Fallback for anything the fast path doesn't cover (e.g. 'apr')
+    try:
+        return datetime.strptime(date_str, '%d %b %Y').date()
+    except ValueError:
+        return None
+
 
 class BNIParser(BaseBankParser):
     """
@@ -24,14 +42,16 @@ class BNIParser(BaseBankParser):
     bank_name = "BNI"
     bank_code = "bni"
     
-    def __init__(self, password: str = None):
+    def __init__(self, password: str = None, use_pymupdf: bool = False):
         super().__init__()
         self.password = password
+        # Opt-in: PyMuPDF's regrouped lines are not yet validated against pdfplumber
+        self.use_pymupdf = use_pymupdf
         self._account_info = None
 
     def extract_account_info(self, pdf_path: str) -> AccountInfo:
         """Extract account info from header."""
-        data = extract_account_info_bni(pdf_path, self.password)
+        data = extract_account_info_bni(pdf_path, self.password, self.use_pymupdf)
         
         return AccountInfo(
             account_number=data.get('No_Rekening', ''),
@@ -43,61 +63,69 @@ class BNIParser(BaseBankParser):
 
     def extract_transactions(self, pdf_path: str) -> List[Transaction]:
         """Extract all transactions from PDF."""
-        # Use existing parser which returns a DataFrame
-        df = extract_transactions_from_bni(pdf_path, self.password)
+        # Column lists straight from the scanner - no DataFrame or per-row dicts
+        cols = extract_transaction_columns_bni(pdf_path, self.password, self.use_pymupdf)
         
-        if df.empty:
+        n = len(cols['Tanggal'])
+        if not n:
             return []
-            
-        transactions = []
         
-        for _, row in df.iterrows():
+        # Amount and type for all rows in one pass (Debit/Kredit are exclusive)
+        debits = np.fromiter((self._parse_amount(v) for v in cols['Debit']), dtype=np.float64, count=n)
+        credits = np.fromiter((self._parse_amount(v) for v in cols['Kredit']), dtype=np.float64, count=n)
+        is_debit = debits > 0
+        amounts = np.where(is_debit, debits, credits).tolist()
+        txn_types = [_TXN_TYPES[code] for code in is_debit.astype(np.int8).tolist()]
+        
+        # Bind per-row lookups to locals once, outside the loop
+        parse_amount = self._parse_amount
+        map_category = self._map_category
+        infer_channel = self._infer_channel
+        bank_name = self.bank_name
+        
+        # Row count is known up front; fill by index and trim skipped rows at the end
+        transactions = [None] * n
+        k = 0
+        
+        rows = zip(
+            cols['Tanggal'], cols['Tipe_Transaksi'], cols['Deskripsi'], cols['Saldo'],
+            cols['Waktu'], cols['Penerima'], cols['Bank_Tujuan'], cols['No_Akun_Tujuan'],
+            cols['Keterangan'], cols['E_Wallet'], cols['Deskripsi_Lengkap'],
+        )
+        for i, (tanggal, tipe, desc, saldo, waktu, penerima, bank, akun, keterangan, ewallet, lengkap) in enumerate(rows):
             # Parse date (Format: 01 Apr 2025)
-            date_str = row['Tanggal']
-            try:
-                # Convert Indonesian month names if needed, though parser seems to output English short months?
-                # The existing parser outputs "01 Apr 2025" based on my test run.
-                txn_date = datetime.strptime(date_str, '%d %b %Y').date()
-            except ValueError:
-                # Fallback or skip
+            txn_date = _parse_date(tanggal)
+            if txn_date is None:
+                # Indonesian month names (e.g. 'Mei') are skipped
                 continue
-                
-            # Parse amount and type
-            debit = self._parse_amount(row.get('Debit', '0'))
-            credit = self._parse_amount(row.get('Kredit', '0'))
-            
-            if debit > 0:
-                amount = debit
-                txn_type = TransactionType.DEBIT
-            else:
-                amount = credit
-                txn_type = TransactionType.CREDIT
             
             # Map category
-            # We can use the 'Tipe_Transaksi' or 'Klasifikasi' to help
-            category = self._map_category(row)
+            # Based on 'Tipe_Transaksi' and the description
+            category = map_category(tipe, desc, ewallet)
             
             t = Transaction(
                 date=txn_date,
-                description=row.get('Deskripsi', ''),
-                amount=amount,
-                transaction_type=txn_type,
-                balance=self._parse_amount(row.get('Saldo', '0')),
+                description=desc,
+                amount=amounts[i],
+                transaction_type=txn_types[i],
+                balance=parse_amount(saldo),
                 category=category,
-                channel=self._infer_channel(row),
-                txn_time=row.get('Waktu'),
+                channel=infer_channel(tipe),
+                txn_time=waktu,
                 
                 # Extended fields from BNI parser
-                counterparty=row.get('Penerima'),
-                counterparty_bank=row.get('Bank_Tujuan'),
-                counterparty_account=row.get('No_Akun_Tujuan'),
-                notes=row.get('Keterangan'),
+                counterparty=penerima,
+                counterparty_bank=bank,
+                counterparty_account=akun,
+                notes=keterangan,
                 
-                source_bank=self.bank_name,
-                raw_text=row.get('Deskripsi_Lengkap', '')
+                source_bank=bank_name,
+                raw_text=lengkap
             )
-            transactions.append(t)
-            
+            transactions[k] = t
+            k += 1
+        
+        del transactions[k:]
         return transactions
 
     def _parse_amount(self, val) -> float:
@@ -113,10 +141,10 @@ class BNIParser(BaseBankParser):
         except ValueError:
             return 0.0
 
-    def _map_category(self, row) -> TransactionCategory:
+    def _map_category(self, tipe: str, desc: str, ewallet: str) -> TransactionCategory:
         """Map BNI transaction types to standard categories."""
-        tipe = str(row.get('Tipe_Transaksi', '')).upper()
-        desc = str(row.get('Deskripsi', '')).upper()
+        tipe = tipe.upper()
+        desc = desc.upper()
         
         if 'TRANSFER' in tipe or 'TRF' in desc:
             return TransactionCategory.TRANSFER
@@ -132,15 +160,14 @@ class BNIParser(BaseBankParser):
             return TransactionCategory.INTEREST
         
         # Check e-wallets
-        ewallet = row.get('E_Wallet', '')
         if ewallet:
             return TransactionCategory.E_WALLET
             
         return TransactionCategory.OTHER
 
-    def _infer_channel(self, row) -> str:
+    def _infer_channel(self, tipe: str) -> str:
         """Infer channel from transaction type."""
-        tipe = str(row.get('Tipe_Transaksi', '')).upper()
+        tipe = tipe.upper()
         
         if 'MOBILE' in tipe or 'MBANK' in tipe:
             return 'Mobile Banking'
@@ -5,11 +5,31 @@ Password protected PDFs are supported
 Format aligned with CASA parser for consistency
 """
 
+import multiprocessing
+import os
 import pdfplumber
+import numpy as np
 import pandas as pd
+import xlsxwriter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import re
+import sys
 
+from src.parsers.pdf_text import fitz_page_texts
+
+# google-re2 (optional) scans the big keyword alternations in linear time;
+# small single-use patterns stay on stdlib re
+try:
+    import re2 as _re_engine
+except ImportError:
+    _re_engine = re
+
+
+# compile_bni_pdfs' workers are spawned, not forked: forking a process that
+# has other threads running (e.g. the web app's parse threads) can deadlock
+# the child on a lock one of them held at fork time
+_POOL_CONTEXT = multiprocessing.get_context('spawn')
 
 # Default password for BNI PDFs
 BNI_PASSWORD = '02121979'
@@ -27,18 +47,107 @@ EWALLET_PATTERNS = {
     'LINKAJA': 'LinkAja',
 }
 
+# Precompiled patterns (compiled once at import, not per page/transaction)
+# Name is whole uppercase words on one line, so the name/whitespace/product
+# boundaries can't overlap and a non-matching page is scanned in linear time
+_NAME_ACCT_RE = re.compile(
+    r'^[^\S\n]*([A-Z]+(?:[^\S\n]+[A-Z]+)*)\s+(TAPLUS|TAPENAS|BNI Giro|[A-Za-z]+)\s*-\s*(\d+)',
+    re.MULTILINE,
+)
+_PERIODE_RE = re.compile(r'Periode:\s*([^\n]+)')
+_PHONE_RE = re.compile(r'(62\d{9,}|08\d{9,})')
+_TRANSFER_RE = re.compile(r'^(BNI|BCA|BRI|MANDIRI|CIMB)\s*[-]\s*(.+)$', re.IGNORECASE)
+_QRIS_MERCHANT_RE = re.compile(r'^([A-Z0-9\s]+?)(?:\s*[-]\s*|\s+(?:JAKARTA|KOTA|BANDUNG|SURABAYA))', re.IGNORECASE)
+# A transaction starts on a line "DD Mon YYYY <type>"; [^\S\n] is whitespace
+# that stays on the same line, so one finditer over the page finds every row
+_DATE_LINE_RE = re.compile(
+    r'^[^\S\n]*(\d{2}[^\S\n]+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec|Januari|Februari|Maret|April|Mei|Juni|Juli|Agustus|September|Oktober|November|Desember)'
+    r'[^\S\n]+\d{4}[^\S\n]+\S[^\n]*)$',
+    re.MULTILINE,
+)
+_AMOUNT_RE = re.compile(r'^([+-][\d,]+)\s+([\d,]+)$')
+_TIME_RE = re.compile(r'^(\d{2}:\d{2}:\d{2})\s+WIB\s*(.*)$')
+_YEAR_RE = re.compile(r'_(\d{4})\.pdf')
+# Statement month in the filename (Indonesian name -> sheet/column name)
+_FILE_MONTHS = {
+    'Januari': 'Jan', 'Februari': 'Feb', 'Maret': 'Mar', 'April': 'Apr',
+    'Mei': 'May', 'Juni': 'Jun', 'Juli': 'Jul', 'Agustus': 'Aug',
+    'September': 'Sep', 'Oktober': 'Oct', 'November': 'Nov', 'Desember': 'Dec'
+}
+_FILE_MONTH_INDEX = {indo: i for i, indo in enumerate(_FILE_MONTHS)}
+_FILE_MONTH_RE = re.compile('|'.join(_FILE_MONTHS))
+# Header/footer text that disqualifies a line from being a transaction
+_SKIP_MARKERS = (
+    'Laporan Mutasi', 'Periode:', 'Saldo Awal', 'Total Pemasukan',
+    'Total Pengeluaran', 'Saldo Akhir', 'Tanggal & Waktu',
+    'Rincian Transaksi', 'Nominal (IDR)', 'Saldo (IDR)',
+    'PT Bank Negara Indonesia', 'berizin dan diawasi',
+    'peserta penjaminan', 'dari 7', 'dari 6', 'dari 5', 'dari 8'
+)
+_SKIP_RE = re.compile('|'.join(re.escape(m) for m in _SKIP_MARKERS))
+_EWALLET_RE = re.compile('|'.join(re.escape(k) for k in EWALLET_PATTERNS))
+
+# Classification keywords (matched against lowercased "tipe desc penerima")
+PERSONAL_KEYWORDS = [
+    'gokana', 'burger king', 'mcd', 'kfc', 'starbucks', 'coffee',
+    'transmart', 'superindo', 'alfamart', 'indomaret',
+    'holland bakery', 'breadtalk', 'jco', 'es teh',
+    'gopay', 'ovo', 'dana', 'shopeepay',
+    'netflix', 'spotify', 'youtube',
+    'grab', 'gojek', 'warung', 'nasi goreng'
+]
+
+COMPANY_KEYWORDS = [
+    'pemerintah', 'ditjen', 'perbendaharaan', 'depkeu',
+    'virtual account', 'pusbanglin', 'badan bahasa',
+    'kantor', 'office', 'monami'
+]
+
+# QRIS merchants that indicate a personal (food) purchase
+PERSONAL_PLACES = [
+    'gokana', 'burger', 'mcd', 'kfc', 'starbucks', 'bakery',
+    'coffee', 'resto', 'cafe', 'warung', 'nasi goreng', 'es teh'
+]
+
+# One alternation per keyword group: a single C-level search per row
+_PERSONAL_RE = _re_engine.compile('|'.join(re.escape(k) for k in PERSONAL_KEYWORDS))
+_COMPANY_RE = _re_engine.compile('|'.join(re.escape(k) for k in COMPANY_KEYWORDS))
+_PLACES_RE = _re_engine.compile('|'.join(re.escape(k) for k in PERSONAL_PLACES))
+
 
 def extract_ewallet(text: str) -> str:
     """Extract e-wallet name from text."""
     text_upper = text.upper()
+    # Most rows mention no wallet: one C-level scan rules them out
+    if not _EWALLET_RE.search(text_upper):
+        return ''
+    # Dict order decides which wallet wins when several appear
     for pattern, name in EWALLET_PATTERNS.items():
         if pattern in text_upper:
             return name
     return ''
 
 
-def extract_account_info_bni(pdf_path: str, password: str = None) -> dict:
-    """Extract account information from BNI PDF header."""
+def _extract_page_texts(pdf_path: str, password: str, max_pages: int = None,
+                        use_pymupdf: bool = False) -> list:
+    """
+    Return the text of each page (up to max_pages).
+    
+    Uses pdfplumber, or PyMuPDF when `use_pymupdf` is set and it is
+    installed and can read the file. `pdf_path` may also be a binary
+    file object.
+    """
+    if use_pymupdf:
+        page_texts = fitz_page_texts(pdf_path, password, max_pages)
+        if page_texts is not None:
+            return page_texts
+    
+    with pdfplumber.open(pdf_path, password=password) as pdf:
+        return [page.extract_text() for page in pdf.pages[:max_pages]]
+
+
+def _parse_account_info_from_text(text: str) -> dict:
+    """Parse account information from the first page's text."""
     info = {
         'No_Rekening': '',
         'Jenis_Produk': '',
@@ -48,23 +157,27 @@ def extract_account_info_bni(pdf_path: str, password: str = None) -> dict:
         'Bank': 'BNI'
     }
     
+    if text:
+        name_acct = _NAME_ACCT_RE.search(text)
+        if name_acct:
+            info['Nama'] = name_acct.group(1).strip()
+            info['Jenis_Produk'] = name_acct.group(2).strip()
+            info['No_Rekening'] = name_acct.group(3).strip()
+        
+        periode_match = _PERIODE_RE.search(text)
+        if periode_match:
+            info['Periode'] = periode_match.group(1).strip()
+    
+    return info
+
+
+def extract_account_info_bni(pdf_path: str, password: str = None, use_pymupdf: bool = False) -> dict:
+    """Extract account information from BNI PDF header."""
     pw = password or BNI_PASSWORD
     
-    with pdfplumber.open(pdf_path, password=pw) as pdf:
-        if pdf.pages:
-            text = pdf.pages[0].extract_text()
-            if text:
-                name_acct = re.search(r'^([A-Z\s]+)\s+(TAPLUS|TAPENAS|BNI Giro|[A-Za-z]+)\s*-\s*(\d+)', text, re.MULTILINE)
-                if name_acct:
-                    info['Nama'] = name_acct.group(1).strip()
-                    info['Jenis_Produk'] = name_acct.group(2).strip()
-                    info['No_Rekening'] = name_acct.group(3).strip()
-                
-                periode_match = re.search(r'Periode:\s*(.+?)(?:\n|$)', text)
-                if periode_match:
-                    info['Periode'] = periode_match.group(1).strip()
+    page_texts = _extract_page_texts(pdf_path, pw, max_pages=1, use_pymupdf=use_pymupdf)
     
-    return info
+    return _parse_account_info_from_text(page_texts[0] if page_texts else None)
 
 
 def parse_bni_description(tipe: str, desc: str) -> dict:
@@ -84,16 +197,16 @@ def parse_bni_description(tipe: str, desc: str) -> dict:
     if ewallet:
         result['E_Wallet'] = ewallet
         # Extract phone number for e-wallet
-        phone_match = re.search(r'(62\d{9,}|08\d{9,})', combined)
+        phone_match = _PHONE_RE.search(combined)
         if phone_match:
             result['No_Akun_Tujuan'] = phone_match.group(1)
     
     # Transfer recipient extraction
     if 'TRANSFER' in tipe.upper():
         # Format: "BNI - RECIPIENT NAME" or "BANK - RECIPIENT NAME"
-        transfer_match = re.match(r'^(BNI|BCA|BRI|MANDIRI|CIMB)\s*[-]\s*(.+)$', desc, re.IGNORECASE)
+        transfer_match = _TRANSFER_RE.match(desc)
         if transfer_match:
-            result['Bank_Tujuan'] = transfer_match.group(1).upper()
+            result['Bank_Tujuan'] = sys.intern(transfer_match.group(1).upper())
             result['Penerima'] = transfer_match.group(2).strip()
         else:
             result['Penerima'] = desc
@@ -101,7 +214,7 @@ def parse_bni_description(tipe: str, desc: str) -> dict:
     # QRIS payment - merchant name is the recipient
     if 'QRIS' in tipe.upper() or 'PEMBAYARAN QRIS' in tipe.upper():
         # Extract merchant name (before location)
-        merchant_match = re.match(r'^([A-Z0-9\s]+?)(?:\s*[-]\s*|\s+(?:JAKARTA|KOTA|BANDUNG|SURABAYA))', desc, re.IGNORECASE)
+        merchant_match = _QRIS_MERCHANT_RE.match(desc)
         if merchant_match:
             result['Penerima'] = merchant_match.group(1).strip()
         else:
@@ -119,174 +232,205 @@ def parse_bni_description(tipe: str, desc: str) -> dict:
     return result
 
 
-def extract_transactions_from_bni(pdf_path: str, password: str = None) -> pd.DataFrame:
-    """Extract all transactions from a BNI bank statement PDF."""
-    pdf_path = Path(pdf_path)
+# Per-transaction columns produced by the page scanner, in output order
+_RECORD_COLUMNS = (
+    'Tanggal', 'Tipe_Transaksi', 'Waktu', 'Deskripsi', 'Debit', 'Kredit', 'Saldo',
+    'Deskripsi_Lengkap', 'Penerima', 'Bank_Tujuan', 'E_Wallet', 'No_Akun_Tujuan', 'Keterangan',
+)
+_ACCOUNT_COLUMNS = ('No_Rekening', 'Nama', 'Jenis_Produk', 'Mata_Uang', 'Periode')
+
+# Low-cardinality columns of the combined workbook data
+_CATEGORICAL_COLUMNS = ('Klasifikasi', 'Audit_Flag', 'Month', 'Year', 'Jenis_Produk', 'Mata_Uang')
+
+
+def extract_transaction_columns_bni(pdf_path: str, password: str = None, use_pymupdf: bool = False) -> dict:
+    """
+    Extract all transactions from a BNI bank statement PDF as columns.
+    
+    Returns a dict of column name -> list (one entry per transaction),
+    which builds a DataFrame directly without per-row dicts.
+    """
     pw = password or BNI_PASSWORD
     
-    account_info = extract_account_info_bni(str(pdf_path), pw)
-    all_transactions = []
+    cols = {name: [] for name in _RECORD_COLUMNS}
+    tanggal_col, tipe_col, waktu_col = cols['Tanggal'], cols['Tipe_Transaksi'], cols['Waktu']
+    deskripsi_col, debit_col, kredit_col = cols['Deskripsi'], cols['Debit'], cols['Kredit']
+    saldo_col, lengkap_col, penerima_col = cols['Saldo'], cols['Deskripsi_Lengkap'], cols['Penerima']
+    bank_col, ewallet_col, akun_col = cols['Bank_Tujuan'], cols['E_Wallet'], cols['No_Akun_Tujuan']
+    keterangan_col = cols['Keterangan']
     
-    with pdfplumber.open(pdf_path, password=pw) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text()
-            if not text:
+    # Single open: the header is read from the first page's text
+    page_texts = _extract_page_texts(pdf_path, pw, use_pymupdf=use_pymupdf)
+    account_info = _parse_account_info_from_text(page_texts[0] if page_texts else None)
+    
+    for text in page_texts:
+        if not text:
+            continue
+        
+        # Every date line is a record boundary; up to 3 lines after it belong to it
+        matches = list(_DATE_LINE_RE.finditer(text))
+        for k, match in enumerate(matches):
+            line = match.group(1).strip()
+            
+            if _SKIP_RE.search(line):
+                continue
+            
+            parts = line.split(maxsplit=4)
+            if len(parts) < 4:
                 continue
             
-            lines = text.split('\n')
-            date_pattern = re.compile(r'^\d{2}\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec|Januari|Februari|Maret|April|Mei|Juni|Juli|Agustus|September|Oktober|November|Desember)\s+\d{4}\s+')
+            # Intern: the same few transaction types repeat on every page
+            tipe_transaksi = sys.intern(' '.join(parts[3:])) if len(parts) > 3 else ''
+            waktu = debit = kredit = saldo = ''
             
-            i = 0
-            while i < len(lines):
-                line = lines[i].strip()
+            block_end = matches[k + 1].start() if k + 1 < len(matches) else len(text)
+            desc_lines = []
+            for next_line in text[match.end():block_end].split('\n')[1:4]:
+                next_line = next_line.strip()
                 
-                if any(skip in line for skip in [
-                    'Laporan Mutasi', 'Periode:', 'Saldo Awal', 'Total Pemasukan',
-                    'Total Pengeluaran', 'Saldo Akhir', 'Tanggal & Waktu',
-                    'Rincian Transaksi', 'Nominal (IDR)', 'Saldo (IDR)',
-                    'PT Bank Negara Indonesia', 'berizin dan diawasi',
-                    'peserta penjaminan', 'dari 7', 'dari 6', 'dari 5', 'dari 8'
-                ]):
-                    i += 1
+                amount_match = _AMOUNT_RE.match(next_line)
+                if amount_match:
+                    amount = amount_match.group(1)
+                    if amount.startswith('-'):
+                        debit = amount
+                    else:
+                        kredit = amount.replace('+', '')
+                    saldo = amount_match.group(2)
                     continue
                 
-                if date_pattern.match(line):
-                    parts = line.split(maxsplit=4)
-                    
-                    if len(parts) >= 4:
-                        tipe_transaksi = ' '.join(parts[3:]) if len(parts) > 3 else ''
-                        
-                        txn = {
-                            'Tanggal': f"{parts[0]} {parts[1]} {parts[2]}",
-                            'Tipe_Transaksi': tipe_transaksi,
-                            'Waktu': '',
-                            'Deskripsi': '',
-                            'Debit': '',
-                            'Kredit': '',
-                            'Saldo': '',
-                            'Deskripsi_Lengkap': line
-                        }
-                        
-                        j = i + 1
-                        desc_lines = []
-                        while j < len(lines) and j < i + 4:
-                            next_line = lines[j].strip()
-                            
-                            if date_pattern.match(next_line):
-                                break
-                            
-                            amount_match = re.match(r'^([+-][\d,]+)\s+([\d,]+)$', next_line)
-                            if amount_match:
-                                amount = amount_match.group(1)
-                                if amount.startswith('-'):
-                                    txn['Debit'] = amount
-                                else:
-                                    txn['Kredit'] = amount.replace('+', '')
-                                txn['Saldo'] = amount_match.group(2)
-                                j += 1
-                                continue
-                            
-                            time_match = re.match(r'^(\d{2}:\d{2}:\d{2})\s+WIB\s*(.*)$', next_line)
-                            if time_match:
-                                txn['Waktu'] = time_match.group(1)
-                                if time_match.group(2):
-                                    desc_lines.append(time_match.group(2).strip())
-                                j += 1
-                                continue
-                            
-                            j += 1
-                        
-                        txn['Deskripsi'] = ' '.join(desc_lines) if desc_lines else ''
-                        txn['Deskripsi_Lengkap'] += ' | ' + txn['Deskripsi'] if txn['Deskripsi'] else ''
-                        
-                        # Parse description for structured fields
-                        parsed = parse_bni_description(tipe_transaksi, txn['Deskripsi'])
-                        txn['Penerima'] = parsed['Penerima']
-                        txn['Bank_Tujuan'] = parsed['Bank_Tujuan']
-                        txn['E_Wallet'] = parsed['E_Wallet']
-                        txn['No_Akun_Tujuan'] = parsed['No_Akun_Tujuan']
-                        txn['Keterangan'] = parsed['Keterangan']
-                        
-                        # Add account info
-                        txn['No_Rekening'] = account_info['No_Rekening']
-                        txn['Nama'] = account_info['Nama']
-                        txn['Jenis_Produk'] = account_info['Jenis_Produk']
-                        txn['Mata_Uang'] = account_info['Mata_Uang']
-                        txn['Periode'] = account_info['Periode']
-                        
-                        # Classify transaction
-                        txn['Klasifikasi'] = classify_bni_transaction(txn)
-                        audit_flag, audit_notes = audit_bni_transaction(txn)
-                        txn['Audit_Flag'] = audit_flag
-                        txn['Audit_Notes'] = audit_notes
-                        
-                        all_transactions.append(txn)
-                
-                i += 1
+                time_match = _TIME_RE.match(next_line)
+                if time_match:
+                    waktu = time_match.group(1)
+                    if time_match.group(2):
+                        desc_lines.append(time_match.group(2).strip())
+            
+            deskripsi = ' '.join(desc_lines) if desc_lines else ''
+            
+            # Parse description for structured fields
+            parsed = parse_bni_description(tipe_transaksi, deskripsi)
+            
+            tanggal_col.append(f"{parts[0]} {parts[1]} {parts[2]}")
+            tipe_col.append(tipe_transaksi)
+            waktu_col.append(waktu)
+            deskripsi_col.append(deskripsi)
+            debit_col.append(debit)
+            kredit_col.append(kredit)
+            saldo_col.append(saldo)
+            lengkap_col.append(line + ' | ' + deskripsi if deskripsi else line)
+            penerima_col.append(parsed['Penerima'])
+            bank_col.append(parsed['Bank_Tujuan'])
+            ewallet_col.append(parsed['E_Wallet'])
+            akun_col.append(parsed['No_Akun_Tujuan'])
+            keterangan_col.append(parsed['Keterangan'])
+    
+    # Account info is the same for every row of the statement
+    n = len(tanggal_col)
+    for name in _ACCOUNT_COLUMNS:
+        cols[name] = [account_info[name]] * n
+    
+    return cols
+
+
+def _file_month_year(filename: str) -> tuple:
+    """Return (month index, month, year) from a BNI filename; missing parts are 99/None."""
+    month_match = _FILE_MONTH_RE.search(filename)
+    year_match = _YEAR_RE.search(filename)
+    if month_match:
+        indo = month_match.group(0)
+        index, month = _FILE_MONTH_INDEX[indo], _FILE_MONTHS[indo]
+    else:
+        index, month = 99, None
+    return index, month, year_match.group(1) if year_match else None
+
+
+def _extract_bni_file_columns(pdf_path: str, password: str = None,
+                              month: str = None, year: str = None) -> dict:
+    """extract_transaction_columns_bni plus the per-file Source_File/Month/Year columns."""
+    pdf_path = Path(pdf_path)
+    cols = extract_transaction_columns_bni(str(pdf_path), password)
+    if month is None and year is None:
+        _, month, year = _file_month_year(pdf_path.name)
+    
+    n = len(cols['Tanggal'])
+    cols['Source_File'] = [pdf_path.name] * n
+    cols['Month'] = [month] * n
+    cols['Year'] = [year] * n
+    return cols
+
+
+def _try_extract_bni_file(pdf_path: str, password: str = None,
+                          month: str = None, year: str = None) -> tuple:
+    """
+    _extract_bni_file_columns as (columns, None), or (None, error message).
+    
+    Errors come back as values so one unreadable PDF doesn't stop the
+    other files' results.
+    """
+    try:
+        return _extract_bni_file_columns(pdf_path, password, month, year), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _build_bni_frame(cols: dict) -> pd.DataFrame:
+    """Build the classified/audited DataFrame from (merged) column lists."""
+    df = pd.DataFrame(cols, copy=False)
+    
+    # A filename without a month/year leaves that column out, as before
+    for col in ('Month', 'Year'):
+        if col in df.columns and df[col].isna().all():
+            del df[col]
+    
+    # Classify/audit whole columns at once rather than per row,
+    # sharing one lowercased "tipe desc penerima" column between them
+    combined = _lower_combined(df)
+    df['Klasifikasi'] = classify_bni_frame(df, combined)
+    df['Audit_Flag'], df['Audit_Notes'] = audit_bni_frame(df, combined)
+    return df
+
+
+def extract_transactions_from_bni(pdf_path: str, password: str = None,
+                                  month: str = None, year: str = None) -> pd.DataFrame:
+    """
+    Extract all transactions from a BNI bank statement PDF.
     
-    if not all_transactions:
-        return pd.DataFrame()
+    `month`/`year` label the rows; when not given they are read from the filename.
+    """
+    cols = _extract_bni_file_columns(pdf_path, password, month, year)
     
-    df = pd.DataFrame(all_transactions)
-    df['Source_File'] = pdf_path.name
+    if not cols['Tanggal']:
+        return pd.DataFrame()
     
-    month_map = {
-        'Januari': 'Jan', 'Februari': 'Feb', 'Maret': 'Mar', 'April': 'Apr',
-        'Mei': 'May', 'Juni': 'Jun', 'Juli': 'Jul', 'Agustus': 'Aug',
-        'September': 'Sep', 'Oktober': 'Oct', 'November': 'Nov', 'Desember': 'Dec'
-    }
+    return _build_bni_frame(cols)
+
+
+def _row_combined(row: dict) -> str:
+    """Lowercased 'tipe desc penerima' for one row."""
+    return f"{row.get('Tipe_Transaksi', '')} {row.get('Deskripsi', '')} {row.get('Penerima', '')}".lower()
+
+
+def classify_bni_transaction(row: dict, combined: str = None) -> str:
+    """
+    Classify BNI transaction as Company, Private, or Review.
     
-    for indo, eng in month_map.items():
-        if indo in pdf_path.name:
-            df['Month'] = eng
-            break
+    `combined` is the lowercased "tipe desc penerima" string; pass it in
+    when it was already built (e.g. for audit_bni_transaction too).
+    """
+    if combined is None:
+        combined = _row_combined(row)
     
-    year_match = re.search(r'_(\d{4})\.pdf', pdf_path.name)
-    if year_match:
-        df['Year'] = year_match.group(1)
+    if _COMPANY_RE.search(combined):
+        return 'Company'
     
-    return df
-
-
-def classify_bni_transaction(row: dict) -> str:
-    """Classify BNI transaction as Company, Private, or Review."""
-    tipe = str(row.get('Tipe_Transaksi', '')).lower()
-    desc = str(row.get('Deskripsi', '')).lower()
-    penerima = str(row.get('Penerima', '')).lower()
-    
-    personal_keywords = [
-        'gokana', 'burger king', 'mcd', 'kfc', 'starbucks', 'coffee',
-        'transmart', 'superindo', 'alfamart', 'indomaret',
-        'holland bakery', 'breadtalk', 'jco', 'es teh',
-        'gopay', 'ovo', 'dana', 'shopeepay',
-        'netflix', 'spotify', 'youtube',
-        'grab', 'gojek', 'warung', 'nasi goreng'
-    ]
-    
-    company_keywords = [
-        'pemerintah', 'ditjen', 'perbendaharaan', 'depkeu',
-        'virtual account', 'pusbanglin', 'badan bahasa',
-        'kantor', 'office', 'monami'
-    ]
-    
-    combined = (tipe + ' ' + desc + ' ' + penerima).lower()
-    
-    for kw in company_keywords:
-        if kw in combined:
-            return 'Company'
-    
-    for kw in personal_keywords:
-        if kw in combined:
-            return 'Private'
+    if _PERSONAL_RE.search(combined):
+        return 'Private'
     
     return 'Review'
 
 
-def audit_bni_transaction(row: dict) -> tuple:
+def audit_bni_transaction(row: dict, combined: str = None) -> tuple:
     """Audit BNI transaction for suspicious patterns."""
     tipe = str(row.get('Tipe_Transaksi', '')).lower()
-    desc = str(row.get('Deskripsi', '')).lower()
-    penerima = str(row.get('Penerima', '')).lower()
     ewallet = str(row.get('E_Wallet', '')).lower()
     debit = str(row.get('Debit', ''))
     
@@ -298,18 +442,17 @@ def audit_bni_transaction(row: dict) -> tuple:
     notes = []
     flag = 'OK'
     
-    combined = (tipe + ' ' + desc + ' ' + penerima).lower()
+    if combined is None:
+        combined = _row_combined(row)
     
     # E-wallet top-ups
-    if ewallet or 'ewallet' in tipe.lower() or 'gopay' in combined or 'shopeepay' in combined:
+    if ewallet or 'ewallet' in tipe or 'gopay' in combined or 'shopeepay' in combined:
         flag = 'SUSPICIOUS'
         notes.append(f'E-wallet top-up ({ewallet or "unknown"})')
     
     # QRIS payments at personal locations
-    if 'qris' in tipe.lower():
-        personal_places = ['gokana', 'burger', 'mcd', 'kfc', 'starbucks', 'bakery', 
-                          'coffee', 'resto', 'cafe', 'warung', 'nasi goreng', 'es teh']
-        if any(p in combined for p in personal_places):
+    if 'qris' in tipe:
+        if _PLACES_RE.search(combined):
             flag = 'SUSPICIOUS'
             notes.append('Restaurant/food purchase')
     
@@ -319,17 +462,17 @@ def audit_bni_transaction(row: dict) -> tuple:
         notes = ['Government transfer']
     
     # Virtual Account to Pusbanglin is OK
-    if 'virtual account' in tipe.lower() and 'pusbanglin' in combined:
+    if 'virtual account' in tipe and 'pusbanglin' in combined:
         flag = 'OK'
         notes = ['Office virtual account']
     
     # Large cash deposits/withdrawals
-    if 'setor tunai' in tipe.lower() or 'tarik tunai' in tipe.lower():
+    if 'setor tunai' in tipe or 'tarik tunai' in tipe:
         flag = 'NEEDS_JUSTIFICATION'
         notes = [f'Cash transaction (Rp {debit_val:,.0f})']
     
     # Biaya / Fees (usually OK)
-    if 'biaya' in tipe.lower():
+    if 'biaya' in tipe:
         flag = 'OK'
         notes = ['Bank fee']
     
@@ -339,6 +482,67 @@ def audit_bni_transaction(row: dict) -> tuple:
     return (flag, '; '.join(notes))
 
 
+def _lower_combined(df: pd.DataFrame) -> pd.Series:
+    """Lowercased 'tipe desc penerima' for every row."""
+    return (df['Tipe_Transaksi'].astype(str) + ' ' + df['Deskripsi'].astype(str)
+            + ' ' + df['Penerima'].astype(str)).str.lower()
+
+
+def classify_bni_frame(df: pd.DataFrame, combined: pd.Series = None) -> pd.Series:
+    """Vectorized classify_bni_transaction over a transactions DataFrame."""
+    if combined is None:
+        combined = _lower_combined(df)
+    
+    company = combined.str.contains(_COMPANY_RE.pattern, regex=True)
+    personal = combined.str.contains(_PERSONAL_RE.pattern, regex=True)
+    
+    return pd.Series(
+        np.select([company, personal], ['Company', 'Private'], default='Review'),
+        index=df.index,
+    )
+
+
+def audit_bni_frame(df: pd.DataFrame, combined: pd.Series = None) -> tuple:
+    """Vectorized audit_bni_transaction; returns (flags, notes) Series."""
+    tipe = df['Tipe_Transaksi'].astype(str).str.lower()
+    ewallet = df['E_Wallet'].astype(str).str.lower()
+    if combined is None:
+        combined = _lower_combined(df)
+    
+    debit_val = pd.to_numeric(
+        df['Debit'].astype(str).str.replace(r'[,+-]', '', regex=True),
+        errors='coerce',
+    ).fillna(0).abs()
+    
+    is_ewallet = ((ewallet != '') | tipe.str.contains('ewallet', regex=False)
+                  | combined.str.contains('gopay', regex=False)
+                  | combined.str.contains('shopeepay', regex=False))
+    is_food = tipe.str.contains('qris', regex=False) & combined.str.contains(_PLACES_RE.pattern, regex=True)
+    is_gov = combined.str.contains('pemerintah', regex=False) | combined.str.contains('ditjen', regex=False)
+    is_office_va = tipe.str.contains('virtual account', regex=False) & combined.str.contains('pusbanglin', regex=False)
+    is_cash = tipe.str.contains('setor tunai', regex=False) | tipe.str.contains('tarik tunai', regex=False)
+    is_fee = tipe.str.contains('biaya', regex=False)
+    
+    ewallet_note = 'E-wallet top-up (' + ewallet.where(ewallet != '', 'unknown') + ')'
+    cash_note = 'Cash transaction (Rp ' + debit_val.map('{:,.0f}'.format) + ')'
+    
+    # Later rules override earlier ones, so they come first here
+    overrides = [is_fee, is_cash, is_office_va, is_gov]
+    flags = np.select(
+        overrides + [is_ewallet | is_food],
+        ['OK', 'NEEDS_JUSTIFICATION', 'OK', 'OK', 'SUSPICIOUS'],
+        default='OK',
+    )
+    notes = np.select(
+        overrides + [is_ewallet & is_food, is_ewallet, is_food],
+        ['Bank fee', cash_note, 'Office virtual account', 'Government transfer',
+         ewallet_note + '; Restaurant/food purchase', ewallet_note, 'Restaurant/food purchase'],
+        default='Standard transaction',
+    )
+    
+    return pd.Series(flags, index=df.index), pd.Series(notes, index=df.index)
+
+
 def parse_amount(value: str) -> float:
     """Parse BNI formatted amount to float."""
     if not value or value.strip() == '':
@@ -353,6 +557,38 @@ def parse_amount(value: str) -> float:
         return 0.0
 
 
+def parse_amount_column(values: pd.Series) -> pd.Series:
+    """Vectorized parse_amount over a whole column."""
+    s = values.fillna('').astype(str).str.strip()
+    sign = np.where(s.str.startswith('-'), -1.0, 1.0)
+    cleaned = s.str.replace(r'[,+-]', '', regex=True)
+    return pd.to_numeric(cleaned, errors='coerce').fillna(0.0) * sign
+
+
+def _write_sheet(workbook, sheet_name: str, df: pd.DataFrame, header_format=None):
+    """
+    Write a DataFrame to a new worksheet and size its columns.
+    
+    constant_memory mode flushes a row as soon as the next one starts,
+    so cells go out row by row (pandas' to_excel writes column-wise).
+    Widths come from the data because written cells can't be read back.
+    """
+    worksheet = workbook.add_worksheet(sheet_name)
+    values = df.astype(object).where(df.notna(), None)
+    
+    for col_idx, col in enumerate(df.columns):
+        series = df[col]
+        data_length = series.astype(str).str.len()[series.notna()].max()
+        max_length = max(len(str(col)), 0 if pd.isna(data_length) else int(data_length))
+        worksheet.set_column(col_idx, col_idx, min(max_length + 2, 50))
+    
+    worksheet.write_row(0, 0, [str(c) for c in df.columns], header_format)
+    for row_idx, row in enumerate(values.itertuples(index=False, name=None), start=1):
+        worksheet.write_row(row_idx, 0, row)
+    
+    return worksheet
+
+
 def compile_bni_pdfs(pdf_dir: str, output_file: str = None, password: str = None) -> str:
     """Compile all BNI PDF statements into Excel (CASA-compatible format)."""
     pdf_path = Path(pdf_dir)
@@ -364,45 +600,58 @@ def compile_bni_pdfs(pdf_dir: str, output_file: str = None, password: str = None
         print(f"❌ No BNI PDF files found in {pdf_dir}")
         return None
     
-    month_order = {'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
-                   'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12}
-    month_indo = ['Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni',
-                  'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember']
-    
-    def get_month_sort_key(f):
-        for i, month in enumerate(month_indo):
-            if month in f.name:
-                return i
-        return 99
-    
-    pdf_files.sort(key=get_month_sort_key)
+    # Read month/year from each filename once; used for sorting and row labels
+    meta = {f: _file_month_year(f.name) for f in pdf_files}
+    pdf_files.sort(key=lambda f: meta[f][0])
     
     print(f"📂 Found {len(pdf_files)} BNI PDF file(s)")
     print("=" * 60)
     
-    all_dataframes = []
-    
-    for pdf_file in pdf_files:
+    # Per-file column lists are appended onto one set of lists, so the
+    # combined frame is built (and classified) once instead of concatenated
+    merged = {}
+    total = 0
+    
+    # Each PDF is independent and pdfminer-bound, so extract them in parallel.
+    # A single file (or core) gains nothing from a pool, so it is extracted
+    # inline without starting worker processes. Results come back in file
+    # order to keep the month sort.
+    jobs = [(str(f), pw, *meta[f][1:]) for f in pdf_files]
+    max_workers = min(len(pdf_files), os.cpu_count() or 1)
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=_POOL_CONTEXT) as executor:
+            results = list(executor.map(_try_extract_bni_file, *zip(*jobs)))
+    else:
+        results = [_try_extract_bni_file(*job) for job in jobs]
+    
+    for pdf_file, (cols, error) in zip(pdf_files, results):
         print(f"  📄 Processing: {pdf_file.name}...", end=' ')
-        try:
-            df = extract_transactions_from_bni(str(pdf_file), pw)
-            if not df.empty:
-                all_dataframes.append(df)
-                print(f"✓ {len(df)} transactions")
-            else:
-                print("⚠ No data extracted")
-        except Exception as e:
-            print(f"❌ Error: {e}")
-    
-    if not all_dataframes:
+        if error is not None:
+            print(f"❌ Error: {error}")
+            continue
+        count = len(cols['Tanggal'])
+        if count:
+            for name, values in cols.items():
+                merged.setdefault(name, []).extend(values)
+            total += count
+            print(f"✓ {count} transactions")
+        else:
+            print("⚠ No data extracted")
+    
+    if not total:
         print("❌ No data extracted from any files")
         return None
     
-    combined_df = pd.concat(all_dataframes, ignore_index=True)
+    combined_df = _build_bni_frame(merged)
+    
+    # Small fixed vocabularies: store as categoricals (1 code per row, int compares)
+    for col in _CATEGORICAL_COLUMNS:
+        if col in combined_df.columns:
+            combined_df[col] = combined_df[col].astype('category')
     
-    combined_df['Debit_Value'] = combined_df['Debit'].apply(parse_amount)
-    combined_df['Kredit_Value'] = combined_df['Kredit'].apply(parse_amount)
-    combined_df['Saldo_Value'] = combined_df['Saldo'].apply(parse_amount)
+    combined_df['Debit_Value'] = parse_amount_column(combined_df['Debit'])
+    combined_df['Kredit_Value'] = parse_amount_column(combined_df['Kredit'])
+    combined_df['Saldo_Value'] = parse_amount_column(combined_df['Saldo'])
     
     if not output_file:
         output_file = pdf_path.parent / 'BNI_Combined_Statements.xlsx'
@@ -410,7 +659,11 @@ def compile_bni_pdfs(pdf_dir: str, output_file: str = None, password: str = None
     print("\n" + "=" * 60)
     print(f"💾 Saving to: {output_file}")
     
-    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+    # constant_memory streams each row to disk instead of holding the workbook;
+    # cells are literal text, never formulas (e.g. the '=== ... ===' labels)
+    with xlsxwriter.Workbook(str(output_file), {'constant_memory': True, 'strings_to_formulas': False}) as workbook:
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        
         # Main sheet - CASA compatible columns
         column_order = [
             'Audit_Flag', 'Audit_Notes', 'Klasifikasi',
@@ -424,19 +677,22 @@ def compile_bni_pdfs(pdf_dir: str, output_file: str = None, password: str = None
             'Month', 'Year'
         ]
         existing_cols = [c for c in column_order if c in combined_df.columns]
-        combined_df[existing_cols].to_excel(writer, index=False, sheet_name='All_Transactions')
+        _write_sheet(workbook, 'All_Transactions', combined_df[existing_cols], header_format)
+        
+        # Summary calculations - one groupby per dimension for counts and totals
+        klas_agg = combined_df.groupby('Klasifikasi', observed=True)['Debit_Value'].agg(['sum', 'size'])
+        audit_agg = combined_df.groupby('Audit_Flag', observed=True)['Debit_Value'].agg(['sum', 'size'])
         
-        # Summary calculations
-        company_total = combined_df[combined_df['Klasifikasi'] == 'Company']['Debit_Value'].sum()
-        private_total = combined_df[combined_df['Klasifikasi'] == 'Private']['Debit_Value'].sum()
-        review_total = combined_df[combined_df['Klasifikasi'] == 'Review']['Debit_Value'].sum()
+        company_total = klas_agg['sum'].get('Company', 0.0)
+        private_total = klas_agg['sum'].get('Private', 0.0)
+        review_total = klas_agg['sum'].get('Review', 0.0)
         
-        suspicious_count = (combined_df['Audit_Flag'] == 'SUSPICIOUS').sum()
-        suspicious_total = combined_df[combined_df['Audit_Flag'] == 'SUSPICIOUS']['Debit_Value'].sum()
-        needs_just_count = (combined_df['Audit_Flag'] == 'NEEDS_JUSTIFICATION').sum()
-        needs_just_total = combined_df[combined_df['Audit_Flag'] == 'NEEDS_JUSTIFICATION']['Debit_Value'].sum()
-        ok_count = (combined_df['Audit_Flag'] == 'OK').sum()
-        ok_total = combined_df[combined_df['Audit_Flag'] == 'OK']['Debit_Value'].sum()
+        suspicious_count = audit_agg['size'].get('SUSPICIOUS', 0)
+        suspicious_total = audit_agg['sum'].get('SUSPICIOUS', 0.0)
+        needs_just_count = audit_agg['size'].get('NEEDS_JUSTIFICATION', 0)
+        needs_just_total = audit_agg['sum'].get('NEEDS_JUSTIFICATION', 0.0)
+        ok_count = audit_agg['size'].get('OK', 0)
+        ok_total = audit_agg['sum'].get('OK', 0.0)
         
         summary_data = {
             'Metric': [
@@ -469,9 +725,9 @@ def compile_bni_pdfs(pdf_dir: str, output_file: str = None, password: str = None
                 ok_count, f"{ok_total:,.2f}",
                 '',
                 '',
-                (combined_df['Klasifikasi'] == 'Company').sum(), f"{company_total:,.2f}",
-                (combined_df['Klasifikasi'] == 'Private').sum(), f"{private_total:,.2f}",
-                (combined_df['Klasifikasi'] == 'Review').sum(), f"{review_total:,.2f}",
+                klas_agg['size'].get('Company', 0), f"{company_total:,.2f}",
+                klas_agg['size'].get('Private', 0), f"{private_total:,.2f}",
+                klas_agg['size'].get('Review', 0), f"{review_total:,.2f}",
                 '',
                 '',
                 len(combined_df),
@@ -479,51 +735,49 @@ def compile_bni_pdfs(pdf_dir: str, output_file: str = None, password: str = None
                 f"{combined_df['Kredit_Value'].sum():,.2f}"
             ]
         }
-        pd.DataFrame(summary_data).to_excel(writer, index=False, sheet_name='Summary')
+        _write_sheet(workbook, 'Summary', pd.DataFrame(summary_data), header_format)
+        
+        # Per-sheet slices: one groupby per dimension instead of a mask per sheet
+        audit_groups = dict(list(combined_df.groupby('Audit_Flag', observed=True)))
+        klas_groups = dict(list(combined_df.groupby('Klasifikasi', observed=True)))
         
         # SUSPICIOUS sheet
-        suspicious_df = combined_df[combined_df['Audit_Flag'] == 'SUSPICIOUS'].copy()
-        if not suspicious_df.empty:
+        suspicious_df = audit_groups.get('SUSPICIOUS')
+        if suspicious_df is not None:
             susp_cols = ['Audit_Notes', 'Tanggal', 'Waktu', 'Tipe_Transaksi', 'Penerima', 
                         'E_Wallet', 'Keterangan', 'Debit', 'Saldo']
             existing = [c for c in susp_cols if c in suspicious_df.columns]
-            suspicious_df[existing].to_excel(writer, index=False, sheet_name='SUSPICIOUS')
+            _write_sheet(workbook, 'SUSPICIOUS', suspicious_df[existing], header_format)
         
         # NEEDS_JUSTIFICATION sheet
-        needs_just_df = combined_df[combined_df['Audit_Flag'] == 'NEEDS_JUSTIFICATION'].copy()
-        if not needs_just_df.empty:
+        needs_just_df = audit_groups.get('NEEDS_JUSTIFICATION')
+        if needs_just_df is not None:
             just_cols = ['Audit_Notes', 'Tanggal', 'Waktu', 'Tipe_Transaksi', 'Penerima', 
                         'Keterangan', 'Debit', 'Kredit', 'Saldo']
             existing = [c for c in just_cols if c in needs_just_df.columns]
-            needs_just_df[existing].to_excel(writer, index=False, sheet_name='NEEDS_JUSTIFICATION')
+            _write_sheet(workbook, 'NEEDS_JUSTIFICATION', needs_just_df[existing], header_format)
         
         # Classification sheets
         for classification in ['Company', 'Private', 'Review']:
-            class_df = combined_df[combined_df['Klasifikasi'] == classification].copy()
-            if not class_df.empty:
+            class_df = klas_groups.get(classification)
+            if class_df is not None:
                 class_cols = ['Audit_Flag', 'Audit_Notes', 'Tanggal', 'Waktu', 
                              'Tipe_Transaksi', 'Penerima', 'E_Wallet',
                              'Keterangan', 'Debit', 'Kredit', 'Saldo']
                 existing = [c for c in class_cols if c in class_df.columns]
-                class_df[existing].to_excel(writer, index=False, sheet_name=classification)
+                _write_sheet(workbook, classification, class_df[existing], header_format)
         
         # Monthly sheets
         if 'Month' in combined_df.columns:
-            for month in month_order.keys():
-                if month in combined_df['Month'].values:
-                    month_df = combined_df[combined_df['Month'] == month].copy()
+            month_groups = dict(list(combined_df.groupby('Month', observed=True)))
+            for month in _FILE_MONTHS.values():
+                month_df = month_groups.get(month)
+                if month_df is not None:
                     month_cols = ['Audit_Flag', 'Audit_Notes', 'Klasifikasi', 'Tanggal', 'Waktu',
                                  'Tipe_Transaksi', 'Penerima', 'E_Wallet',
                                  'Keterangan', 'Debit', 'Kredit', 'Saldo']
                     existing = [c for c in month_cols if c in month_df.columns]
-                    month_df[existing].to_excel(writer, index=False, sheet_name=month)
-        
-        # Auto-adjust columns
-        for sheet_name in writer.sheets:
-            worksheet = writer.sheets[sheet_name]
-            for column in worksheet.columns:
-                max_length = max(len(str(cell.value or '')) for cell in column)
-                worksheet.column_dimensions[column[0].column_letter].width = min(max_length + 2, 50)
+                    _write_sheet(workbook, month, month_df[existing], header_format)
     
     print(f"✨ Successfully compiled {len(combined_df)} transactions from {len(pdf_files)} files!")
     print(f"\n📊 Account: {combined_df['Nama'].iloc[0]} ({combined_df['No_Rekening'].iloc[0]})")
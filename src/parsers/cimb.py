@@ -18,38 +18,100 @@ Handles 12 transaction types:
 """
 
 import re
+import sys
 import pdfplumber
-from datetime import datetime
+from datetime import date
+from itertools import chain
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator
 
-from src.parsers.base import BaseBankParser
+from src.parsers.base import BaseBankParser, MONTHS
+from src.parsers.pdf_text import fitz_page_texts
 from src.models.transaction import (
     Transaction, AccountInfo, TransactionType, TransactionCategory
 )
 
 
+# Precompiled patterns (compiled once at import, not per block)
+_DATE_RE = re.compile(r'(\d{2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4})')
+_AMOUNT_RE = re.compile(r'(-?[\d,]+\.\d{2})')
+_TIME_RE = re.compile(r'(\d{2}:\d{2}:\d{2})')
+_NO_REK_RE = re.compile(r'No\.\s*Rekening\s*:\s*(\d+)')
+_NAMA_RE = re.compile(r'Nama\s*:\s*(.+?)(?:\n|Mata)')
+_PERIODE_RE = re.compile(r'Periode:\s*(.+?)(?:\n|$)')
+_REF12_16_RE = re.compile(r'(?<!\d)(\d{12,16})(?!\d)')
+_TRANSFER_NAME_RE = re.compile(r'TO\s+([A-Z][A-Z\s\.\-]+?)(?:\s+\d{2}:|\s+\d{9,})')
+_BIFAST_RE = re.compile(r'BIFAST\s+(\w{20,})')
+_SENDER_RE = re.compile(r'(?:FR\s+\w+\s+)([A-Z][A-Z\s]+)(?:\s+\d|$)')
+_OVERBOOK_NAME_RE = re.compile(r'TO\s*-?\s*([A-Z][A-Z\s]+?)(?:\s+\d{2}:)')
+_PHONE_RE = re.compile(r'(08\d{9,11})')
+_CDM_TERMINAL_RE = re.compile(r'\d{2}:\d{2}:\d{2}\s+(\d{4})\s')
+_CARD528_RE = re.compile(r'(528\d{13})')
+_QR_MERCHANT_RE = re.compile(r'QR Purchase\s+(\w+)')
+_MASKED_CARD_RE = re.compile(r'(\d{6}\*+\d{4})')
+_NOTES_RE = re.compile(r'(?<!\S)([a-z]\S{2,}.*)')
+# Channel labels, interned once and shared by every transaction
+_CH_OCTO_MOBILE = sys.intern('OCTO Mobile')
+_CH_BIFAST = sys.intern('BI-FAST')
+_CH_EWALLET = sys.intern('E-Wallet')
+_CH_ATM_CDM = sys.intern('ATM/CDM')
+_CH_QR = sys.intern('QR Payment')
+_CH_SYSTEM = sys.intern('System')
+_CH_DEBIT_CARD = sys.intern('Debit Card')
+# Card-number prefixes that look like 12-digit transfer references
+_CARD_PREFIXES = frozenset({'5576', '5289'})
+# Header/footer text that ends the current block
+_STOP_MARKERS = (
+    'Saldo Awal', 'Saldo Akhir', 'Total Kredit', 'Total Debit',
+    'IMPORTANT', 'Page ', 'User ID, Password', 'bersifat rahasia',
+)
+_STOP_RE = re.compile('|'.join(re.escape(m) for m in _STOP_MARKERS))
+# Stop markers that only occur in the fine-print page footer; nothing
+# after them on a page is a transaction
+_FOOTER_MARKERS = ('IMPORTANT', 'User ID, Password', 'bersifat rahasia')
+_FOOTER_RE = re.compile('|'.join(re.escape(m) for m in _FOOTER_MARKERS))
+
+
+def _strip_page_footer(page_text: str) -> str:
+    """
+    Cut a page's text after the line holding its first footer marker.
+    
+    The marker line itself is kept so it still ends the current block;
+    the fine print after it is never split into lines or scanned.
+    """
+    match = _FOOTER_RE.search(page_text)
+    if not match:
+        return page_text
+    end = page_text.find('\n', match.end())
+    return page_text if end == -1 else page_text[:end]
+
+
 class CIMBParser(BaseBankParser):
     """
     Parser for CIMB Niaga / OCTO Mobile statements.
     
     Uses type-specific extraction for accurate field parsing.
+    
+    All regexes and lookup tables are built once at import (module or
+    class level), so creating a CIMBParser per file is cheap; an instance
+    only holds the page texts of the file being parsed.
     """
     
     bank_name = "CIMB"
     bank_code = "cimb"
     
     # Base patterns
-    DATE_PATTERN = r'(\d{2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4})'
-    AMOUNT_PATTERN = r'(-?[\d,]+\.\d{2})'
-    TIME_PATTERN = r'(\d{2}:\d{2}:\d{2})'
+    DATE_PATTERN = _DATE_RE.pattern
+    AMOUNT_PATTERN = _AMOUNT_RE.pattern
+    TIME_PATTERN = _TIME_RE.pattern
     
-    # Bank code mapping (expanded)
+    # Bank code mapping (expanded). Lookups scan in this order and stop at
+    # the first hit, so the most common counterparty banks come first.
     BANK_CODES = {
         'CENAIDJA': 'BCA',
+        'BMRIIDJA': 'Mandiri',
         'BRINIDJA': 'BRI',
         'BNINIDJA': 'BNI',
-        'BMRIIDJA': 'Mandiri',
         'CABORELA': 'CIMB',
         'PERMIDJA': 'Permata',
         'BDKIIDJA': 'Bank DKI',
@@ -77,22 +139,54 @@ class CIMBParser(BaseBankParser):
         'LINKAJA': 'LinkAja',
     }
     
+    # Any-code alternations: one scan rules out blocks with no code at all,
+    # the ordered dict loop then only runs on a hit (dict order decides)
+    _BANK_CODE_RE = re.compile('|'.join(map(re.escape, BANK_CODES)))
+    _EWALLET_RE = re.compile('|'.join(map(re.escape, EWALLET_PATTERNS)))
+    
+    def __init__(self, use_pymupdf: bool = False):
+        super().__init__()
+        # Opt-in: PyMuPDF's regrouped lines are not yet validated against pdfplumber
+        self.use_pymupdf = use_pymupdf
+        self._page_texts = None  # (pdf_path, [page text, ...]) of the last file read
+    
+    def _read_page_texts(self, pdf_path: str) -> List[str]:
+        """
+        Page texts of a PDF, opening it only once per file.
+        
+        parse() asks for the header and then the transactions; both read
+        from the same cached texts instead of opening the PDF twice.
+        """
+        if self._page_texts is None or self._page_texts[0] != pdf_path:
+            # pdfplumber (pdfminer), or PyMuPDF when opted in and installed
+            page_texts = fitz_page_texts(pdf_path) if self.use_pymupdf else None
+            if page_texts is None:
+                page_texts = []
+                with pdfplumber.open(pdf_path) as pdf:
+                    for page in pdf.pages:
+                        page_texts.append(page.extract_text() or "")
+                        # Free the page's parsed chars/layout now rather than
+                        # keeping every page's objects until the PDF closes
+                        page.close()
+            self._page_texts = (pdf_path, page_texts)
+        return self._page_texts[1]
+    
     def extract_account_info(self, pdf_path: str) -> AccountInfo:
         """Extract account info from CIMB statement header."""
-        with pdfplumber.open(pdf_path) as pdf:
-            text = pdf.pages[0].extract_text() or ""
+        page_texts = self._read_page_texts(pdf_path)
+        text = page_texts[0] if page_texts else ""
         
         info = AccountInfo(bank_name=self.bank_name)
         
-        match = re.search(r'No\.\s*Rekening\s*:\s*(\d+)', text)
+        match = _NO_REK_RE.search(text)
         if match:
             info.account_number = match.group(1)
         
-        match = re.search(r'Nama\s*:\s*(.+?)(?:\n|Mata)', text)
+        match = _NAMA_RE.search(text)
         if match:
             info.account_name = match.group(1).strip()
         
-        match = re.search(r'Periode:\s*(.+?)(?:\n|$)', text)
+        match = _PERIODE_RE.search(text)
         if match:
             info.statement_period = match.group(1).strip()
         
@@ -100,98 +194,100 @@ class CIMBParser(BaseBankParser):
     
     def extract_transactions(self, pdf_path: str) -> List[Transaction]:
         """Extract all transactions from CIMB PDF."""
-        transactions = []
-        
-        with pdfplumber.open(pdf_path) as pdf:
-            full_text = ""
-            for page in pdf.pages:
-                page_text = page.extract_text() or ""
-                full_text += page_text + "\n"
-        
-        blocks = self._split_into_blocks(full_text)
-        
-        for block in blocks:
-            txn = self._parse_transaction_block(block)
-            if txn:
-                transactions.append(txn)
+        page_texts = self._read_page_texts(pdf_path)
+        # Done with this file: don't keep its text alive on the parser
+        self._page_texts = None
+        
+        # Lines go page by page (a block may continue onto the next page),
+        # so the whole document is never joined into one string
+        lines = chain.from_iterable(
+            _strip_page_footer(text).split('\n') for text in page_texts
+        )
+        # Each block is parsed as soon as its lines end, so the list of
+        # block strings is never built
+        parsed = map(self._parse_transaction_block, self._iter_blocks(lines))
         
-        return transactions
+        return [txn for txn in parsed if txn]
     
-    def _split_into_blocks(self, text: str) -> List[str]:
-        """Split full text into transaction blocks."""
-        lines = text.split('\n')
-        blocks = []
+    def _iter_blocks(self, lines: Iterable[str]) -> Iterator[str]:
+        """Yield transaction blocks from lines as soon as each one ends."""
         current_block = []
         
-        STOP_MARKERS = [
-            'Saldo Awal', 'Saldo Akhir', 'Total Kredit', 'Total Debit',
-            'IMPORTANT', 'Page ', 'User ID, Password', 'bersifat rahasia',
-        ]
-        
         for line in lines:
             line_stripped = line.strip()
             
-            if any(marker in line_stripped for marker in STOP_MARKERS):
+            if _STOP_RE.search(line_stripped):
                 if current_block:
-                    blocks.append('\n'.join(current_block))
+                    yield '\n'.join(current_block)
                     current_block = []
                 continue
             
-            if re.match(self.DATE_PATTERN, line_stripped):
+            # Cheap guard first: only lines starting with two digits can be dates
+            if line_stripped[:2].isdigit() and _DATE_RE.match(line_stripped):
                 if current_block:
-                    blocks.append('\n'.join(current_block))
+                    yield '\n'.join(current_block)
                 current_block = [line]
             elif current_block:
                 current_block.append(line)
         
         if current_block:
-            blocks.append('\n'.join(current_block))
-        
-        return blocks
+            yield '\n'.join(current_block)
     
     def _parse_transaction_block(self, block: str) -> Optional[Transaction]:
         """Parse a transaction block with type-specific extraction."""
-        lines = block.strip().split('\n')
-        if not lines:
-            return None
-        
-        first_line = lines[0]
+        first_line, _, rest = block.strip().partition('\n')
         
         # Extract date
-        date_match = re.match(self.DATE_PATTERN, first_line)
+        date_match = _DATE_RE.match(first_line)
         if not date_match:
             return None
         
+        # _DATE_RE already fixed the 'DD Mon YYYY' shape, so build the date
+        # directly instead of going through strptime's format parser
         try:
-            date_str = date_match.group(1)
-            txn_date = datetime.strptime(date_str, '%d %b %Y').date()
+            day, month, year = date_match.group(1).split()
+            txn_date = date(int(year), MONTHS[month], int(day))
         except ValueError:
             return None
         
-        # Extract amounts
-        amounts = re.findall(self.AMOUNT_PATTERN, first_line)
-        if not amounts:
+        # Extract amounts (after the date; one pass gives values and positions)
+        amount_matches = list(_AMOUNT_RE.finditer(first_line, date_match.end()))
+        if not amount_matches:
             return None
         
-        amount_str = amounts[0].replace(',', '')
+        amount_str = amount_matches[0].group(1).replace(',', '')
         amount = float(amount_str)
         txn_type = TransactionType.DEBIT if amount < 0 else TransactionType.CREDIT
         
         balance = None
-        if len(amounts) > 1:
-            balance = float(amounts[-1].replace(',', ''))
-        
-        # Build full description
-        desc_part = first_line[date_match.end():].strip()
-        for amt in amounts:
-            desc_part = desc_part.replace(amt, '').strip()
-        
-        remaining_lines = [l.strip() for l in lines[1:] if l.strip()]
-        full_text = desc_part + ' ' + ' '.join(remaining_lines)
-        full_text = ' '.join(full_text.split())
+        if len(amount_matches) > 1:
+            balance = float(amount_matches[-1].group(1).replace(',', ''))
+        
+        # Build full description: the first line minus the date and amount spans
+        desc_pieces = []
+        pos = date_match.end()
+        for m in amount_matches:
+            desc_pieces.append(first_line[pos:m.start()])
+            pos = m.end()
+        desc_pieces.append(first_line[pos:])
+        
+        # One split/join normalises all whitespace at once (in CPython it
+        # is several times faster than re.sub(r'\s+', ' ', ...)); split()
+        # also drops blank lines, so the rest of the block needs no strip
+        desc_pieces.append(rest)
+        full_text = ' '.join(' '.join(desc_pieces).split())
+        
+        # Fields most helpers need, scanned once per block
+        time_match = _TIME_RE.search(block)
+        ctx = {
+            'time': time_match.group(1) if time_match else None,
+            'refs': _REF12_16_RE.findall(block),
+            'bank': self._find_bank(block),
+            'block_upper': block.upper(),
+        }
         
         # Detect transaction type and parse accordingly
-        parsed = self._parse_by_type(block, full_text)
+        parsed = self._parse_by_type(block, full_text, ctx)
         
         return Transaction(
             date=txn_date,
@@ -210,315 +306,313 @@ class CIMBParser(BaseBankParser):
             raw_text=block,
         )
     
-    def _parse_by_type(self, block: str, text: str) -> Dict[str, Any]:
-        """Route to type-specific parser based on transaction type."""
+    def _find_bank(self, block: str) -> Optional[str]:
+        """First bank (in BANK_CODES order) whose code appears in the block."""
+        if not self._BANK_CODE_RE.search(block):
+            return None
+        for code, bank in self.BANK_CODES.items():
+            if code in block:
+                return bank
+        return None
+    
+    def _find_ewallet(self, block_upper: str) -> Optional[str]:
+        """First e-wallet (in EWALLET_PATTERNS order) found in the uppercased block."""
+        if not self._EWALLET_RE.search(block_upper):
+            return None
+        for pattern, wallet in self.EWALLET_PATTERNS.items():
+            if pattern in block_upper:
+                return wallet
+        return None
+    
+    def _parse_by_type(self, block: str, text: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Route to type-specific parser based on transaction type.
+        
+        `ctx` holds the block's time, 12-16 digit references, bank and
+        uppercased text, computed once in _parse_transaction_block.
+        """
         text_upper = text.upper()
         
         if 'TR TO REMITT' in text_upper:
-            return self._parse_transfer(block, text)
+            return self._parse_transfer(block, text, ctx)
         elif 'REMITTANCE CR' in text_upper:
-            return self._parse_incoming_transfer(block, text)
-        elif 'OVERBOOKING' in text_upper and 'KWIK' in text_upper:
-            return self._parse_ewallet_topup(block, text)
+            return self._parse_incoming_transfer(block, text, ctx)
         elif 'OVERBOOKING' in text_upper:
-            return self._parse_overbooking(block, text)
+            if 'KWIK' in text_upper:
+                return self._parse_ewallet_topup(block, text, ctx)
+            return self._parse_overbooking(block, text, ctx)
         elif 'CDM CASH DEPOSIT' in text_upper:
-            return self._parse_cash_deposit(block, text)
+            return self._parse_cash_deposit(block, text, ctx)
         elif 'ATM WITHDRAWAL' in text_upper:
-            return self._parse_atm_withdrawal(block, text)
+            return self._parse_atm_withdrawal(block, text, ctx)
         elif 'BILL PAYMENT' in text_upper or 'BILLPAYMENT' in text_upper:
-            return self._parse_bill_payment(block, text)
+            return self._parse_bill_payment(block, text, ctx)
         elif 'CREDIT INTEREST' in text_upper:
-            return self._parse_interest(block, text)
+            return self._parse_interest(block, text, ctx)
         elif 'WITHHOLDING TAX' in text_upper:
-            return self._parse_tax(block, text)
+            return self._parse_tax(block, text, ctx)
         elif 'DEBIT CARD CHARGE' in text_upper:
-            return self._parse_card_charge(block, text)
+            return self._parse_card_charge(block, text, ctx)
         elif 'CASH BACK' in text_upper:
-            return self._parse_cashback(block, text)
+            return self._parse_cashback(block, text, ctx)
         else:
-            return self._parse_generic(block, text)
+            return self._parse_generic(block, text, ctx)
     
     # ==================== TYPE-SPECIFIC PARSERS ====================
     
-    def _parse_transfer(self, block: str, text: str) -> Dict[str, Any]:
+    def _parse_transfer(self, block: str, text: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
         """
         Parse: TR TO REMITT OCTOmobile TO [NAME] [TIME] [NAME2] [REF] [BANK] [notes]
         """
         result = {
             'category': TransactionCategory.TRANSFER,
-            'channel': 'OCTO Mobile',
+            'channel': _CH_OCTO_MOBILE,
             'description': text,
         }
         
         # Time
-        time_match = re.search(self.TIME_PATTERN, block)
-        if time_match:
-            result['time'] = time_match.group(1)
+        if ctx['time']:
+            result['time'] = ctx['time']
         
         # Counterparty name (after "TO")
-        name_match = re.search(r'TO\s+([A-Z][A-Z\s\.\-]+?)(?:\s+\d{2}:|\s+\d{9,})', block)
+        name_match = _TRANSFER_NAME_RE.search(block)
         if name_match:
             result['counterparty'] = name_match.group(1).strip()
         
         # Reference (12-digit number after time, not card number)
-        refs = re.findall(r'(?<!\d)(\d{12})(?!\d)', block)
-        for ref in refs:
-            if not ref.startswith('5576') and not ref.startswith('5289'):
+        for ref in ctx['refs']:
+            if len(ref) == 12 and ref[:4] not in _CARD_PREFIXES:
                 result['reference'] = ref
                 break
         
         # Bank code (no account number in CIMB statements, only reference)
-        for code, bank in self.BANK_CODES.items():
-            if code in block:
-                result['counterparty_bank'] = bank
-                break
+        if ctx['bank']:
+            result['counterparty_bank'] = ctx['bank']
         
-        # Notes (lowercase text at end)
-        lines = block.split('\n')
-        last_line = lines[-1].strip() if lines else ""
-        words = last_line.split()
-        for i, word in enumerate(words):
-            if word and len(word) > 2 and word[0].islower():
-                result['notes'] = ' '.join(words[i:])
-                break
+        # Notes (lowercase text at end): from the last line's first
+        # lowercase word of 3+ chars to the end of the line
+        notes_match = _NOTES_RE.search(block, block.rfind('\n') + 1)
+        if notes_match:
+            result['notes'] = ' '.join(notes_match.group(1).split())
         
         return result
     
-    def _parse_incoming_transfer(self, block: str, text: str) -> Dict[str, Any]:
+    def _parse_incoming_transfer(self, block: str, text: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
         """
         Parse: REMITTANCE CR - BIFAST [TXN_ID] [TIME] BFS FR [BANK] [SENDER] [notes]
         """
         result = {
             'category': TransactionCategory.TRANSFER,
-            'channel': 'BI-FAST',
+            'channel': _CH_BIFAST,
             'description': text,
         }
         
-        time_match = re.search(self.TIME_PATTERN, block)
-        if time_match:
-            result['time'] = time_match.group(1)
+        if ctx['time']:
+            result['time'] = ctx['time']
         
         # Transaction ID (long alphanumeric after BIFAST)
-        txn_match = re.search(r'BIFAST\s+(\w{20,})', block)
+        txn_match = _BIFAST_RE.search(block)
         if txn_match:
             result['reference'] = txn_match.group(1)
         
         # Sender bank (after "FR")
-        for code, bank in self.BANK_CODES.items():
-            if code in block:
-                result['counterparty_bank'] = bank
-                break
+        if ctx['bank']:
+            result['counterparty_bank'] = ctx['bank']
         
         # Sender name (after bank code, often uppercase)
-        sender_match = re.search(r'(?:FR\s+\w+\s+)([A-Z][A-Z\s]+)(?:\s+\d|$)', block)
+        sender_match = _SENDER_RE.search(block)
         if sender_match:
             result['counterparty'] = sender_match.group(1).strip()
         
         return result
     
-    def _parse_overbooking(self, block: str, text: str) -> Dict[str, Any]:
+    def _parse_overbooking(self, block: str, text: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
         """
         Parse: OVERBOOKING OCTOmobile TRF TO - [NAME] [TIME] [ALIAS] [REF]
         """
         result = {
             'category': TransactionCategory.TRANSFER,
-            'channel': 'OCTO Mobile',
+            'channel': _CH_OCTO_MOBILE,
             'description': text,
         }
         
-        time_match = re.search(self.TIME_PATTERN, block)
-        if time_match:
-            result['time'] = time_match.group(1)
+        if ctx['time']:
+            result['time'] = ctx['time']
         
         # Name after "TO -" or "TO"
-        name_match = re.search(r'TO\s*-?\s*([A-Z][A-Z\s]+?)(?:\s+\d{2}:)', block)
+        name_match = _OVERBOOK_NAME_RE.search(block)
         if name_match:
             result['counterparty'] = name_match.group(1).strip()
         
         # Reference
-        refs = re.findall(r'(?<!\d)(\d{12,16})(?!\d)', block)
-        if refs:
-            result['reference'] = refs[0]
+        if ctx['refs']:
+            result['reference'] = ctx['refs'][0]
         
         return result
     
-    def _parse_ewallet_topup(self, block: str, text: str) -> Dict[str, Any]:
+    def _parse_ewallet_topup(self, block: str, text: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
         """
         Parse: OVERBOOKING TO KWIK ... TRF TO [EWALLET] [PHONE] [TIME]
         """
         result = {
             'category': TransactionCategory.E_WALLET,
-            'channel': 'E-Wallet',
+            'channel': _CH_EWALLET,
             'description': text,
         }
         
-        time_match = re.search(self.TIME_PATTERN, block)
-        if time_match:
-            result['time'] = time_match.group(1)
+        if ctx['time']:
+            result['time'] = ctx['time']
         
         # E-wallet type
-        for pattern, wallet in self.EWALLET_PATTERNS.items():
-            if pattern in block.upper():
-                result['counterparty'] = wallet
-                break
+        wallet = self._find_ewallet(ctx['block_upper'])
+        if wallet:
+            result['counterparty'] = wallet
         
         # Phone number
-        phone_match = re.search(r'(08\d{9,11})', block)
+        phone_match = _PHONE_RE.search(block)
         if phone_match:
             result['counterparty_account'] = phone_match.group(1)
         
         # Reference
-        refs = re.findall(r'(?<!\d)(\d{12,16})(?!\d)', block)
-        if refs:
-            result['reference'] = refs[0]
+        if ctx['refs']:
+            result['reference'] = ctx['refs'][0]
         
         return result
     
-    def _parse_cash_deposit(self, block: str, text: str) -> Dict[str, Any]:
+    def _parse_cash_deposit(self, block: str, text: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
         """
         Parse: CDM CASH DEPOSIT ATM/CDM [TIME] [TERMINAL] [CARD]
         """
         result = {
             'category': TransactionCategory.CASH_DEPOSIT,
-            'channel': 'ATM/CDM',
+            'channel': _CH_ATM_CDM,
             'description': text,
         }
         
-        time_match = re.search(self.TIME_PATTERN, block)
-        if time_match:
-            result['time'] = time_match.group(1)
+        if ctx['time']:
+            result['time'] = ctx['time']
         
         # Terminal ID (4-digit number after time)
-        terminal_match = re.search(r'\d{2}:\d{2}:\d{2}\s+(\d{4})\s', block)
+        terminal_match = _CDM_TERMINAL_RE.search(block)
         if terminal_match:
             result['reference'] = terminal_match.group(1)
         
         return result
     
-    def _parse_atm_withdrawal(self, block: str, text: str) -> Dict[str, Any]:
+    def _parse_atm_withdrawal(self, block: str, text: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
         """
         Parse: ATM WITHDRAWAL ATM/CDM [TIME] [CARD]
         """
         result = {
             'category': TransactionCategory.CASH_WITHDRAWAL,
-            'channel': 'ATM/CDM',
+            'channel': _CH_ATM_CDM,
             'description': text,
         }
         
-        time_match = re.search(self.TIME_PATTERN, block)
-        if time_match:
-            result['time'] = time_match.group(1)
+        if ctx['time']:
+            result['time'] = ctx['time']
         
         return result
     
-    def _parse_bill_payment(self, block: str, text: str) -> Dict[str, Any]:
+    def _parse_bill_payment(self, block: str, text: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
         """
         Parse bill payments including credit card payments and QR
         """
         result = {
             'category': TransactionCategory.BILL_PAYMENT,
-            'channel': 'OCTO Mobile',
+            'channel': _CH_OCTO_MOBILE,
             'description': text,
         }
         
-        time_match = re.search(self.TIME_PATTERN, block)
-        if time_match:
-            result['time'] = time_match.group(1)
+        if ctx['time']:
+            result['time'] = ctx['time']
         
         # Credit card number (masked or partial)
-        card_match = re.search(r'(528\d{13})', block)
+        card_match = _CARD528_RE.search(block)
         if card_match:
             result['counterparty_account'] = card_match.group(1)
             result['counterparty'] = 'Credit Card'
         
         # QR merchant
-        if 'QR' in block.upper():
-            result['channel'] = 'QR Payment'
-            merchant_match = re.search(r'QR Purchase\s+(\w+)', block)
+        if 'QR' in ctx['block_upper']:
+            result['channel'] = _CH_QR
+            merchant_match = _QR_MERCHANT_RE.search(block)
             if merchant_match:
                 result['counterparty'] = merchant_match.group(1)
         
         # Reference
-        refs = re.findall(r'(?<!\d)(\d{12,16})(?!\d)', block)
-        if refs:
-            result['reference'] = refs[0]
+        if ctx['refs']:
+            result['reference'] = ctx['refs'][0]
         
         return result
     
-    def _parse_interest(self, block: str, text: str) -> Dict[str, Any]:
+    def _parse_interest(self, block: str, text: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
         """Parse: CREDIT INTEREST [TIME]"""
         return {
             'category': TransactionCategory.INTEREST,
-            'channel': 'System',
+            'channel': _CH_SYSTEM,
             'description': 'Monthly Interest',
-            'time': re.search(self.TIME_PATTERN, block).group(1) if re.search(self.TIME_PATTERN, block) else None,
+            'time': ctx['time'],
         }
     
-    def _parse_tax(self, block: str, text: str) -> Dict[str, Any]:
+    def _parse_tax(self, block: str, text: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
         """Parse: WITHHOLDING TAX [TIME]"""
         return {
             'category': TransactionCategory.FEE,
-            'channel': 'System',
+            'channel': _CH_SYSTEM,
             'description': 'Interest Withholding Tax',
-            'time': re.search(self.TIME_PATTERN, block).group(1) if re.search(self.TIME_PATTERN, block) else None,
+            'time': ctx['time'],
         }
     
-    def _parse_card_charge(self, block: str, text: str) -> Dict[str, Any]:
+    def _parse_card_charge(self, block: str, text: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
         """Parse: DEBIT CARD CHARGES [TIME] [MASKED_CARD]"""
         result = {
             'category': TransactionCategory.CARD_CHARGE,
-            'channel': 'Debit Card',
+            'channel': _CH_DEBIT_CARD,
             'description': 'Monthly Card Fee',
         }
         
-        time_match = re.search(self.TIME_PATTERN, block)
-        if time_match:
-            result['time'] = time_match.group(1)
+        if ctx['time']:
+            result['time'] = ctx['time']
         
         # Masked card
-        card_match = re.search(r'(\d{6}\*+\d{4})', block)
+        card_match = _MASKED_CARD_RE.search(block)
         if card_match:
             result['reference'] = card_match.group(1)
         
         return result
     
-    def _parse_cashback(self, block: str, text: str) -> Dict[str, Any]:
+    def _parse_cashback(self, block: str, text: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
         """Parse: CASH BACK [REF] [SOURCE] [TIME]"""
         result = {
             'category': TransactionCategory.CASHBACK,
-            'channel': 'System',
+            'channel': _CH_SYSTEM,
             'description': 'Cashback Reward',
         }
         
-        time_match = re.search(self.TIME_PATTERN, block)
-        if time_match:
-            result['time'] = time_match.group(1)
+        if ctx['time']:
+            result['time'] = ctx['time']
         
         # Source (e.g., OVO, GoPay)
-        for pattern, wallet in self.EWALLET_PATTERNS.items():
-            if pattern in block.upper():
-                result['counterparty'] = wallet
-                break
+        wallet = self._find_ewallet(ctx['block_upper'])
+        if wallet:
+            result['counterparty'] = wallet
         
         return result
     
-    def _parse_generic(self, block: str, text: str) -> Dict[str, Any]:
+    def _parse_generic(self, block: str, text: str, ctx: Dict[str, Any]) -> Dict[str, Any]:
         """Fallback parser for unknown transaction types."""
         result = {
             'category': TransactionCategory.OTHER,
             'description': text,
         }
         
-        time_match = re.search(self.TIME_PATTERN, block)
-        if time_match:
-            result['time'] = time_match.group(1)
+        if ctx['time']:
+            result['time'] = ctx['time']
         
         # Bank
-        for code, bank in self.BANK_CODES.items():
-            if code in block:
-                result['counterparty_bank'] = bank
-                break
+        if ctx['bank']:
+            result['counterparty_bank'] = ctx['bank']
         
         return result
 
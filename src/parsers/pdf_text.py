@@ -0,0 +1,66 @@
+"""
+PyMuPDF page text shared by the parsers.
+
+PyMuPDF (optional) is much faster than pdfminer for plain text extraction,
+but its own "text" output puts table cells on separate lines. The helpers
+here rebuild pdfplumber-style lines so the parsers' line regexes work on
+either backend. The regrouping has not been checked line-for-line against
+pdfplumber on real statements, so parsers only use it when asked to
+(`use_pymupdf=True`).
+"""
+
+from typing import List, Optional
+
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
+
+def fitz_page_text(page) -> str:
+    """
+    A PyMuPDF page's words regrouped into lines, as pdfplumber's extract_text does.
+
+    Words whose tops are within 3pt of the previous word share a line and
+    are joined left to right, so each statement row stays on one line.
+    """
+    lines = []
+    line = []
+    last_top = None
+    for x0, top, _, _, word, *_ in sorted(page.get_text("words"), key=lambda w: (w[1], w[0])):
+        if line and top - last_top > 3:
+            lines.append(' '.join(w for _, w in sorted(line)))
+            line = []
+        line.append((x0, word))
+        last_top = top
+    if line:
+        lines.append(' '.join(w for _, w in sorted(line)))
+    return '\n'.join(lines)
+
+
+def fitz_page_texts(pdf_path, password: str = None, max_pages: int = None) -> Optional[List[str]]:
+    """
+    Page texts (up to max_pages) via PyMuPDF.
+
+    Returns None when PyMuPDF is missing, cannot read the file or rejects
+    the password, so the caller can fall back to pdfplumber. `pdf_path`
+    may be a binary file object; it is rewound after reading so the
+    fallback gets the whole stream.
+    """
+    if fitz is None:
+        return None
+    try:
+        if hasattr(pdf_path, 'read'):
+            pdf_path.seek(0)
+            data = pdf_path.read()
+            pdf_path.seek(0)
+            doc = fitz.open(stream=data, filetype='pdf')
+        else:
+            doc = fitz.open(str(pdf_path))
+    except RuntimeError:
+        # FileDataError (damaged or non-PDF data) subclasses RuntimeError
+        return None
+    with doc:
+        if doc.needs_pass and not doc.authenticate(password or ''):
+            return None
+        return [fitz_page_text(page) for page in doc.pages(0, max_pages)]
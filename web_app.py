@@ -9,9 +9,20 @@ Supports multi-file upload (max 10 files) with validation:
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
 import sys
 import io
+import xlsxwriter
+
+# Plotly (optional) powers the visualization tabs
+try:
+    import plotly.express as px
+    import plotly.graph_objects as go
+except ImportError:
+    px = go = None
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -32,6 +43,200 @@ if 'parsed_data' not in st.session_state:
     st.session_state.parsed_data = None
 if 'all_account_info' not in st.session_state:
     st.session_state.all_account_info = []
+if 'parse_fp' not in st.session_state:
+    st.session_state.parse_fp = None
+    st.session_state.parse_result = None
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def parse_statement_file(file_bytes: bytes, name: str, bank_code: str, pdf_password: str):
+    """
+    Parse one classified upload into (DataFrame, file summary).
+    
+    Cached on the file content (plus name, bank and password), so re-parsing
+    the same uploads skips the PDF pipeline. Runs in a worker thread, so it
+    must not call any other st.* functions.
+    """
+    if bank_code == 'bni':
+        parser = BNIParser(password=pdf_password if pdf_password else None)
+    else:
+        parser = CIMBParser()
+    # Parse an in-memory buffer of exactly the bytes in the cache key
+    pdf = io.BytesIO(file_bytes)
+    pdf.name = name
+    transactions = parser.parse(pdf)
+    account_info = parser.account_info
+    
+    # Set source_file
+    for txn in transactions:
+        txn.source_file = name
+    
+    # Get DataFrame (account columns are added once, after the files are combined)
+    df = parser.to_dataframe()
+    
+    file_summary = {
+        'file': name,
+        'bank': account_info.bank_name,
+        'account_number': account_info.account_number,
+        'account_name': account_info.account_name,
+        'period': account_info.statement_period,
+        'transactions': len(transactions),
+    }
+    return df, file_summary
+
+
+# Sub-category keywords, checked in order (first matching subcategory wins).
+# Tuples, since module state is shared by every Streamlit session
+INCOME_PATTERNS = (
+    ('salary', ('gaji', 'salary', 'payroll', 'thr', 'bonus')),
+    ('business_income', ('pembayaran', 'payment from', 'invoice', 'client', 'project')),
+    ('freelance', ('freelance', 'jasa', 'fee', 'honorarium')),
+    ('investment_return', ('dividen', 'dividend', 'bunga deposito', 'return', 'profit')),
+    ('refund', ('refund', 'pengembalian', 'cashback', 'reimburse')),
+    ('gift_received', ('hadiah', 'gift', 'kado', 'ultah', 'birthday')),
+    ('family_support', ('mama', 'papa', 'ibu', 'bapak', 'ortu')),
+    ('loan_received', ('pinjaman', 'loan', 'hutang')),
+)
+SPENDING_PATTERNS = (
+    ('electricity', ('pln', 'listrik', 'token')),
+    ('water', ('pdam', 'air bersih')),
+    ('internet', ('indihome', 'biznet', 'firstmedia', 'wifi', 'internet')),
+    ('phone', ('telkomsel', 'xl', 'indosat', 'pulsa', 'paket data')),
+    ('insurance', ('asuransi', 'bpjs', 'prudential', 'allianz')),
+    ('subscription', ('netflix', 'spotify', 'youtube', 'disney')),
+    ('groceries', ('supermarket', 'indomaret', 'alfamart', 'giant')),
+    ('dining', ('restaurant', 'restoran', 'cafe', 'starbucks', 'mcd', 'kfc', 'warung', 'makan')),
+    ('food_delivery', ('gofood', 'grabfood', 'shopeefood')),
+    ('ride_hailing', ('gojek', 'grab', 'gocar', 'goride')),
+    ('fuel', ('pertamina', 'shell', 'spbu', 'bensin')),
+    ('transport', ('mrt', 'lrt', 'krl', 'transjakarta', 'tol', 'parkir')),
+    ('travel', ('hotel', 'traveloka', 'tiket', 'pesawat', 'garuda', 'lion')),
+    ('online_shopping', ('shopee', 'tokopedia', 'lazada', 'blibli')),
+    ('shopping', ('mall', 'uniqlo', 'zara', 'nike')),
+    ('ewallet_topup', ('top up', 'topup', 'isi saldo', 'dana', 'ovo', 'gopay')),
+    ('healthcare', ('rumah sakit', 'klinik', 'apotek', 'dokter')),
+    ('education', ('sekolah', 'universitas', 'kuliah', 'kursus', 'spp')),
+    ('entertainment', ('bioskop', 'cinema', 'xxi', 'cgv', 'konser')),
+    ('investment', ('investasi', 'saham', 'reksadana', 'crypto', 'bibit')),
+    ('loan_payment', ('cicilan', 'kredit', 'angsuran', 'kpr')),
+    ('family_support', ('mama', 'papa', 'ibu', 'bapak', 'adik', 'kakak', 'keluarga')),
+    ('friend', ('teman', 'kawan', 'patungan')),
+    ('rent', ('sewa', 'kost', 'kontrakan', 'apartment')),
+    ('charity', ('donasi', 'sedekah', 'zakat', 'infaq')),
+)
+# Sub-categories offered in the editor's dropdown (combined income + spending)
+INCOME_SUBCATEGORIES = (
+    'salary', 'business_income', 'freelance', 'investment_return', 
+    'refund', 'gift_received', 'family_support', 'loan_received', 'sale'
+)
+SPENDING_SUBCATEGORIES = (
+    'groceries', 'dining', 'food_delivery', 'coffee',
+    'electricity', 'water', 'internet', 'phone', 'insurance', 'subscription',
+    'ride_hailing', 'fuel', 'transport', 'travel', 'parking',
+    'online_shopping', 'shopping', 'fashion', 'electronics',
+    'ewallet_topup', 'games', 'entertainment',
+    'healthcare', 'education', 'charity',
+    'rent', 'loan_payment', 'credit_card', 'investment', 'savings',
+    'family_support', 'friend', 'gift_given',
+    'admin_fee', 'transfer_fee'
+)
+SUBCATEGORY_OPTIONS = ('',) + tuple(sorted(set(INCOME_SUBCATEGORIES + SPENDING_SUBCATEGORIES)))
+
+TYPE_OPTIONS = ('All', 'credit', 'debit')
+
+
+def predict_subcategory(description: str, notes: str, counterparty: str, txn_type: str) -> str:
+    """Sub-category of one transaction: the first pattern with a keyword in its text."""
+    text = f"{description} {notes} {counterparty}".lower()
+    patterns = INCOME_PATTERNS if txn_type == 'credit' else SPENDING_PATTERNS
+    for subcat, keywords in patterns:
+        for keyword in keywords:
+            if keyword in text:
+                return subcat
+    return ''
+
+
+def predict_subcategories(df: pd.DataFrame) -> pd.Series:
+    """Predict a sub_category for every row from its description/notes/counterparty."""
+    # Plain tuples rather than apply(axis=1), which builds a Series per row
+    fields = df[['description', 'notes', 'counterparty', 'type']].fillna('')
+    return pd.Series(
+        [predict_subcategory(*row) for row in fields.itertuples(index=False, name=None)],
+        index=df.index,
+        dtype=object,
+    )
+
+
+# Chart/export builders are cached on their input frames, so reruns from
+# filter or widget changes reuse them while the data is unchanged
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def timeline_frames(txns: pd.DataFrame):
+    """
+    Frames for the Timeline tab from one cached pass over date/time/type/amount.
+    
+    Returns (amount per (date, type) for the daily volume chart,
+    transactions in time order with signed `flow` and `cumulative` columns).
+    """
+    df_sorted = txns.sort_values(['date', 'time'])
+    daily = df_sorted.groupby(['date', 'type'], observed=True)['amount'].sum().reset_index()
+    amounts = df_sorted['amount'].to_numpy()
+    df_sorted['flow'] = np.where(df_sorted['type'].to_numpy() == 'credit', amounts, -amounts)
+    df_sorted['cumulative'] = df_sorted['flow'].cumsum()
+    return daily, df_sorted
+
+
+def write_sheet(workbook, sheet_name: str, frame: pd.DataFrame, header_format, cell_formats: dict):
+    """
+    Write a DataFrame to a new worksheet: the header row, then the values.
+    
+    Values go straight to the worksheet (to_excel builds and styles a cell
+    object per value, which dominates export time on large statements).
+    Each value gets the format `cell_formats` maps its type to; missing
+    values are left blank.
+    """
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, [str(c) for c in frame.columns], header_format)
+    values = frame.astype(object).where(frame.notna(), None)
+    for row_idx, row in enumerate(values.itertuples(index=False, name=None), start=1):
+        for col_idx, value in enumerate(row):
+            if value is not None:
+                worksheet.write(row_idx, col_idx, value, cell_formats.get(type(value)))
+    return worksheet
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def excel_report(summary_data: dict, all_account_info: list, transactions: pd.DataFrame) -> bytes:
+    """Summary, Files, By Category and Transactions sheets as .xlsx bytes."""
+    buffer = io.BytesIO()
+    with xlsxwriter.Workbook(buffer) as workbook:
+        # One bold, bordered header style for every sheet
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        datetime_format = workbook.add_format({'num_format': 'YYYY-MM-DD HH:MM:SS'})
+        date_formats = {
+            date: workbook.add_format({'num_format': 'YYYY-MM-DD'}),
+            datetime: datetime_format,
+            pd.Timestamp: datetime_format,
+        }
+        
+        # Summary sheet; monetary values (the float entries) stay numeric
+        # cells with a Rupiah number format
+        rupiah = workbook.add_format({'num_format': '"Rp" #,##0;"Rp" -#,##0'})
+        write_sheet(workbook, 'Summary', pd.DataFrame(summary_data), header_format, {float: rupiah})
+        
+        # Files processed
+        write_sheet(workbook, 'Files', pd.DataFrame(all_account_info), header_format, date_formats)
+        
+        # Category breakdown (using edited data)
+        category_counts = transactions.groupby('category', observed=True).agg({
+            'amount': ['count', 'sum']
+        }).reset_index()
+        category_counts.columns = ['Category', 'Count', 'Total Amount']
+        write_sheet(workbook, 'By Category', category_counts, header_format, date_formats)
+        
+        # Transactions (with sub_category edits)
+        write_sheet(workbook, 'Transactions', transactions, header_format, date_formats)
+    return buffer.getvalue()
 
 # Light minimalistic theme colors (Updated to Dark)
 bg_color = "#0d1117"
@@ -200,28 +405,33 @@ if uploaded_files:
         for f in uploaded_files:
             st.text(f"• {f.name}")
     
-    # Parse button
-    if st.button("🚀 Parse Statements", type="primary"):
+    # Parse button; the same uploads and password restore the last result
+    # (undoing edits, as a re-parse would) without parsing again
+    parse_fp = (pdf_password, tuple(f.file_id for f in uploaded_files))
+    parse_clicked = st.button("🚀 Parse Statements", type="primary")
+    if parse_clicked and parse_fp == st.session_state.parse_fp:
+        st.session_state.parsed_data = st.session_state.parse_result
+        parse_clicked = False
+    
+    if parse_clicked:
         classifier = BankClassifier()
-        temp_paths = []
         
-        # Step 1: Save all files temporarily and classify them
+        # Step 1: Load all files into memory and classify them
         st.info("📋 Step 1: Validating files...")
         
         file_info = []
         for uploaded_file in uploaded_files:
-            temp_path = Path(f"/tmp/{uploaded_file.name}")
-            with open(temp_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-            temp_paths.append(temp_path)
+            file_bytes = uploaded_file.getvalue()
+            pdf = io.BytesIO(file_bytes)
+            pdf.name = uploaded_file.name
             
             # Classify
-            bank_code, confidence = classifier.identify_with_confidence(str(temp_path))
+            bank_code, confidence = classifier.identify_with_confidence(pdf)
             file_info.append({
                 'name': uploaded_file.name,
                 'bank_code': bank_code,
                 'confidence': confidence,
-                'path': temp_path,
+                'bytes': file_bytes,
             })
         
         # Step 2: Validate all files are same bank type
@@ -237,11 +447,6 @@ if uploaded_files:
                 for f in file_info
             ])
             st.dataframe(breakdown, use_container_width=True)
-            
-            # Cleanup
-            for p in temp_paths:
-                if p.exists():
-                    p.unlink()
             st.stop()
         
         bank_code = list(bank_types)[0]
@@ -250,9 +455,6 @@ if uploaded_files:
         # Check if parser exists
         if bank_code not in ["cimb", "bni"]:
             st.error(f"❌ Parser for {bank_code.upper()} not implemented yet!")
-            for p in temp_paths:
-                if p.exists():
-                    p.unlink()
             st.stop()
         
         # Step 3: Parse all files and extract account info
@@ -264,48 +466,35 @@ if uploaded_files:
         
         progress_bar = st.progress(0)
         
-        for idx, info in enumerate(file_info):
-            try:
-                if bank_code == 'bni':
-                    parser = BNIParser(password=pdf_password if pdf_password else None)
-                else:
-                    parser = CIMBParser()
-                transactions = parser.parse(str(info['path']))
-                account_info = parser.account_info
-                
-                # Track account number
-                account_numbers.add(account_info.account_number)
-                
-                # Set source_file
-                for txn in transactions:
-                    txn.source_file = info['name']
-                
-                # Get DataFrame
-                df = parser.to_dataframe()
-                df.insert(0, 'account_number', account_info.account_number)
-                df.insert(1, 'account_name', account_info.account_name)
-                df.insert(2, 'bank', account_info.bank_name)
-                df.insert(3, 'period', account_info.statement_period)
-                
-                all_dfs.append(df)
-                all_account_info.append({
-                    'file': info['name'],
-                    'bank': account_info.bank_name,
-                    'account_number': account_info.account_number,
-                    'account_name': account_info.account_name,
-                    'period': account_info.statement_period,
-                    'transactions': len(transactions),
-                })
-                
-            except Exception as e:
-                st.error(f"❌ Error parsing {info['name']}: {e}")
-            
-            progress_bar.progress((idx + 1) / len(file_info))
+        # Parse files concurrently; progress/errors are reported from this
+        # (the script) thread as each file finishes, results kept in file order
+        results = [None] * len(file_info)
+        with ThreadPoolExecutor(max_workers=min(10, len(file_info))) as executor:
+            futures = {
+                executor.submit(
+                    parse_statement_file, info['bytes'], info['name'], bank_code, pdf_password
+                ): idx
+                for idx, info in enumerate(file_info)
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                idx = futures[future]
+                try:
+                    results[idx] = future.result()
+                except Exception as e:
+                    st.error(f"❌ Error parsing {file_info[idx]['name']}: {e}")
+                progress_bar.progress(
+                    done / len(file_info),
+                    text=f"Parsed {done}/{len(file_info)}: {file_info[idx]['name']}",
+                )
         
-        # Cleanup temp files
-        for p in temp_paths:
-            if p.exists():
-                p.unlink()
+        for result in results:
+            if result is None:
+                continue
+            df, file_summary = result
+            # Track account number
+            account_numbers.add(file_summary['account_number'])
+            all_dfs.append(df)
+            all_account_info.append(file_summary)
         
         # Step 4: Validate all files are same account
         if len(account_numbers) > 1:
@@ -324,80 +513,48 @@ if uploaded_files:
         
         if all_dfs:
             combined_df = pd.concat(all_dfs, ignore_index=True)
-            # Sort by date and time
-            combined_df = combined_df.sort_values(['date', 'time'], ascending=[True, True]).reset_index(drop=True)
+            # Account columns first: each file's summary row repeated over its
+            # transactions (all_dfs and all_account_info are in the same order)
+            account_cols = pd.DataFrame(all_account_info)[['account_number', 'account_name', 'bank', 'period']]
+            account_cols = account_cols.loc[account_cols.index.repeat([len(d) for d in all_dfs])]
+            combined_df = pd.concat([account_cols.reset_index(drop=True), combined_df], axis=1)
+            # Sort by date and time (ignore_index renumbers in the same step)
+            combined_df.sort_values(['date', 'time'], ignore_index=True, inplace=True)
             
-            # Auto-predict sub-categories
-            def predict_subcategory(row):
-                text = f"{row.get('description', '')} {row.get('notes', '')} {row.get('counterparty', '')}".lower()
-                txn_type = row.get('type', '')
-                
-                income_patterns = {
-                    'salary': ['gaji', 'salary', 'payroll', 'thr', 'bonus'],
-                    'business_income': ['pembayaran', 'payment from', 'invoice', 'client', 'project'],
-                    'freelance': ['freelance', 'jasa', 'fee', 'honorarium'],
-                    'investment_return': ['dividen', 'dividend', 'bunga deposito', 'return', 'profit'],
-                    'refund': ['refund', 'pengembalian', 'cashback', 'reimburse'],
-                    'gift_received': ['hadiah', 'gift', 'kado', 'ultah', 'birthday'],
-                    'family_support': ['mama', 'papa', 'ibu', 'bapak', 'ortu'],
-                    'loan_received': ['pinjaman', 'loan', 'hutang'],
-                }
-                spending_patterns = {
-                    'electricity': ['pln', 'listrik', 'token'],
-                    'water': ['pdam', 'air bersih'],
-                    'internet': ['indihome', 'biznet', 'firstmedia', 'wifi', 'internet'],
-                    'phone': ['telkomsel', 'xl', 'indosat', 'pulsa', 'paket data'],
-                    'insurance': ['asuransi', 'bpjs', 'prudential', 'allianz'],
-                    'subscription': ['netflix', 'spotify', 'youtube', 'disney'],
-                    'groceries': ['supermarket', 'indomaret', 'alfamart', 'giant'],
-                    'dining': ['restaurant', 'restoran', 'cafe', 'starbucks', 'mcd', 'kfc', 'warung', 'makan'],
-                    'food_delivery': ['gofood', 'grabfood', 'shopeefood'],
-                    'ride_hailing': ['gojek', 'grab', 'gocar', 'goride'],
-                    'fuel': ['pertamina', 'shell', 'spbu', 'bensin'],
-                    'transport': ['mrt', 'lrt', 'krl', 'transjakarta', 'tol', 'parkir'],
-                    'travel': ['hotel', 'traveloka', 'tiket', 'pesawat', 'garuda', 'lion'],
-                    'online_shopping': ['shopee', 'tokopedia', 'lazada', 'blibli'],
-                    'shopping': ['mall', 'uniqlo', 'zara', 'nike'],
-                    'ewallet_topup': ['top up', 'topup', 'isi saldo', 'dana', 'ovo', 'gopay'],
-                    'healthcare': ['rumah sakit', 'klinik', 'apotek', 'dokter'],
-                    'education': ['sekolah', 'universitas', 'kuliah', 'kursus', 'spp'],
-                    'entertainment': ['bioskop', 'cinema', 'xxi', 'cgv', 'konser'],
-                    'investment': ['investasi', 'saham', 'reksadana', 'crypto', 'bibit'],
-                    'loan_payment': ['cicilan', 'kredit', 'angsuran', 'kpr'],
-                    'family_support': ['mama', 'papa', 'ibu', 'bapak', 'adik', 'kakak', 'keluarga'],
-                    'friend': ['teman', 'kawan', 'patungan'],
-                    'rent': ['sewa', 'kost', 'kontrakan', 'apartment'],
-                    'charity': ['donasi', 'sedekah', 'zakat', 'infaq'],
-                }
-                patterns = income_patterns if txn_type == 'credit' else spending_patterns
-                for subcat, keywords in patterns.items():
-                    for keyword in keywords:
-                        if keyword in text:
-                            return subcat
-                return ''
+            # Low-cardinality labels as categoricals: less memory, faster groupby
+            # (type/sub_category stay strings for the editor's Text/Selectbox columns)
+            for col in ('category', 'bank', 'account_number', 'account_name', 'period'):
+                combined_df[col] = combined_df[col].astype('category')
             
-            # Add sub_category column with predictions
+            # Auto-predict sub-categories
             cat_idx = combined_df.columns.get_loc('category')
-            predicted = combined_df.apply(predict_subcategory, axis=1)
+            predicted = predict_subcategories(combined_df)
             combined_df.insert(cat_idx + 1, 'sub_category', predicted)
             
             st.session_state.parsed_data = combined_df
             st.session_state.all_account_info = all_account_info
             st.session_state.validation_passed = len(account_numbers) == 1
+            st.session_state.parse_fp = parse_fp
+            st.session_state.parse_result = combined_df
+            st.session_state.excel_requested = False
     
     # Display results if available
     if st.session_state.parsed_data is not None:
         df = st.session_state.parsed_data
         all_account_info = st.session_state.all_account_info
         
+        # Type masks, evaluated once for the metrics, charts and export
+        is_credit = df['type'].eq('credit').to_numpy()
+        is_debit = df['type'].eq('debit').to_numpy()
+        
         # Summary by file (collapsible)
         with st.expander("📋 Files Processed", expanded=False):
             summary_df = pd.DataFrame(all_account_info)
             st.dataframe(summary_df, use_container_width=True)
         
         # Overall summary with custom cards
-        credits = df[df['type'] == 'credit']['amount'].sum()
-        debits = df[df['type'] == 'debit']['amount'].sum()
+        credits = df.loc[is_credit, 'amount'].sum()
+        debits = df.loc[is_debit, 'amount'].sum()
         net = credits - debits
         
         def format_amount(val):
@@ -445,10 +602,9 @@ if uploaded_files:
         # Visualization section
         st.subheader("📈 Transaction Flow Visualization")
         
-        try:
-            import plotly.express as px
-            import plotly.graph_objects as go
-            
+        if df.empty:
+            st.info("No transactions to visualize")
+        elif px is not None:
             # Tab layout for different visualizations
             viz_tab1, viz_tab2, viz_tab3 = st.tabs(["💸 Money Flow", "📊 Category Breakdown", "📅 Timeline"])
             
@@ -457,164 +613,125 @@ if uploaded_files:
                 # Layout: Income Sub-cats → Income Cats → Account → Expense Cats → Expense Sub-cats
                 st.markdown("**Money Flow: Income Sub-categories → Categories → Account → Categories → Expense Sub-categories**")
                 
-                # Get category totals
-                debit_by_cat = df[df['type'] == 'debit'].groupby('category')['amount'].sum().to_dict()
-                credit_by_cat = df[df['type'] == 'credit'].groupby('category')['amount'].sum().to_dict()
-                
-                # Get sub-category totals (combined by sub_category name, not by category)
-                income_subcat_data = {}  # {subcat: {cat: amount}}
-                expense_subcat_data = {}  # {subcat: {cat: amount}}
-                if 'sub_category' in df.columns:
-                    # Income sub-categories
-                    credit_df = df[df['type'] == 'credit'].copy()
-                    # Replace empty sub-categories with "(Uncategorized)"
-                    credit_df['sub_category'] = credit_df['sub_category'].fillna('(Uncategorized)')
-                    credit_df.loc[credit_df['sub_category'] == '', 'sub_category'] = '(Uncategorized)'
-                    
-                    for (cat, subcat), group in credit_df.groupby(['category', 'sub_category']):
-                        if subcat not in income_subcat_data:
-                            income_subcat_data[subcat] = {}
-                        income_subcat_data[subcat][cat] = group['amount'].sum()
-                    
-                    # Expense sub-categories
-                    debit_df = df[df['type'] == 'debit'].copy()
-                    # Replace empty sub-categories with "(Uncategorized)"
-                    debit_df['sub_category'] = debit_df['sub_category'].fillna('(Uncategorized)')
-                    debit_df.loc[debit_df['sub_category'] == '', 'sub_category'] = '(Uncategorized)'
-                    
-                    for (cat, subcat), group in debit_df.groupby(['category', 'sub_category']):
-                        if subcat not in expense_subcat_data:
-                            expense_subcat_data[subcat] = {}
-                        expense_subcat_data[subcat][cat] = group['amount'].sum()
-                
-                # Calculate totals
-                total_credit = sum(credit_by_cat.values()) if credit_by_cat else 1
-                total_debit = sum(debit_by_cat.values()) if debit_by_cat else 1
-                
-                def fmt_amount(val):
-                    if val >= 1_000_000_000:
-                        return f"Rp {val/1_000_000_000:.1f}B"
-                    elif val >= 1_000_000:
-                        return f"Rp {val/1_000_000:.1f}M"
-                    elif val >= 1_000:
-                        return f"Rp {val/1_000:.0f}K"
-                    return f"Rp {val:,.0f}"
-                
-                # Build nodes and track indices
-                nodes = []
-                node_colors = []
-                hover_texts = []
+                # Category and sub-category totals from a single groupby pass
+                has_subcat = 'sub_category' in df.columns
+                if has_subcat:
+                    # Empty sub-categories are grouped as "(Uncategorized)"
+                    sub_categories = df['sub_category'].fillna('').replace('', '(Uncategorized)')
+                else:
+                    sub_categories = pd.Series('', index=df.index, name='sub_category')
+                totals = df.groupby([df['type'], df['category'], sub_categories], observed=True)['amount'].sum()
                 
-                # Layer 0: Income sub-categories (far left, combined)
-                income_subcat_indices = {}
-                for subcat, cat_amounts in income_subcat_data.items():
-                    total = sum(cat_amounts.values())
-                    label = f"{subcat.replace('_', ' ').title()}<br>{fmt_amount(total)}"
-                    income_subcat_indices[subcat] = len(nodes)
-                    nodes.append(label)
-                    node_colors.append("#81c784")  # Light green
-                    hover_texts.append(f"{subcat.replace('_', ' ').title()}<br>Rp {total:,.0f}")
+                # (category, sub_category) -> amount, per transaction type
+                by_type = {txn_type: group.droplevel(0) for txn_type, group in totals.groupby(level=0, observed=True)}
+                no_totals = totals.iloc[:0].droplevel(0)
+                credit_totals = by_type.get('credit', no_totals)
+                debit_totals = by_type.get('debit', no_totals)
                 
-                # Layer 1: Income categories
-                credit_cats = list(credit_by_cat.keys())
-                credit_cat_indices = {}
-                for cat in credit_cats:
-                    amt = credit_by_cat[cat]
-                    pct = (amt / total_credit) * 100
-                    label = f"{cat.replace('_', ' ').title()}<br>{fmt_amount(amt)} ({pct:.0f}%)"
-                    credit_cat_indices[cat] = len(nodes)
-                    nodes.append(label)
-                    node_colors.append("#66bb6a")
-                    hover_texts.append(f"{cat.replace('_', ' ').title()}<br>Rp {amt:,.0f}")
+                # Category totals, and sub-category totals combined by
+                # sub_category name (not by category) in first-seen order
+                credit_by_cat = credit_totals.groupby(level=0, observed=True).sum()
+                debit_by_cat = debit_totals.groupby(level=0, observed=True).sum()
+                if has_subcat:
+                    income_subcat_totals = credit_totals.groupby(level=1, sort=False, observed=True).sum()
+                    expense_subcat_totals = debit_totals.groupby(level=1, sort=False, observed=True).sum()
+                else:
+                    income_subcat_totals = expense_subcat_totals = no_totals.droplevel(0)
                 
-                # Layer 2: Account node
-                account_idx = len(nodes)
-                account_label = f"Account<br>In: {fmt_amount(total_credit)}<br>Out: {fmt_amount(total_debit)}"
-                nodes.append(account_label)
-                node_colors.append("#90a4ae")
-                hover_texts.append(f"Account<br>Total In: Rp {total_credit:,.0f}<br>Total Out: Rp {total_debit:,.0f}")
+                # Calculate totals
+                total_credit = credit_by_cat.sum() if len(credit_by_cat) else 1
+                total_debit = debit_by_cat.sum() if len(debit_by_cat) else 1
                 
-                # Layer 3: Expense categories
-                debit_cats = list(debit_by_cat.keys())
-                debit_cat_indices = {}
-                for cat in debit_cats:
-                    amt = debit_by_cat[cat]
-                    pct = (amt / total_debit) * 100
-                    label = f"{cat.replace('_', ' ').title()}<br>{fmt_amount(amt)} ({pct:.0f}%)"
-                    debit_cat_indices[cat] = len(nodes)
-                    nodes.append(label)
-                    node_colors.append("#ef5350")
-                    hover_texts.append(f"{cat.replace('_', ' ').title()}<br>Rp {amt:,.0f}")
+                def fmt_amounts(values):
+                    """Short labels (Rp 1.2B / 3.4M / 56K / 789) for an array of amounts."""
+                    amounts = np.asarray(values, dtype=float)
+                    tiers = [amounts >= 1_000_000_000, amounts >= 1_000_000, amounts >= 1_000]
+                    scaled = amounts / np.select(tiers, [1_000_000_000, 1_000_000, 1_000], 1)
+                    labels = np.char.mod(np.select(tiers, ['Rp %.1fB', 'Rp %.1fM', 'Rp %.0fK'], 'Rp %.0f'), scaled).astype(object)
+                    # Below 1K keeps the thousands separator (999.5 rounds to "Rp 1,000")
+                    small = ~tiers[2]
+                    labels[small] = [f"Rp {val:,.0f}" for val in amounts[small]]
+                    return labels
                 
-                # Layer 4: Expense sub-categories (far right, combined)
-                expense_subcat_indices = {}
-                for subcat, cat_amounts in expense_subcat_data.items():
-                    total = sum(cat_amounts.values())
-                    label = f"{subcat.replace('_', ' ').title()}<br>{fmt_amount(total)}"
-                    expense_subcat_indices[subcat] = len(nodes)
-                    nodes.append(label)
-                    node_colors.append("#ffab91")  # Light orange
-                    hover_texts.append(f"{subcat.replace('_', ' ').title()}<br>Rp {total:,.0f}")
+                def layer_nodes(layer_totals, layer_total=None):
+                    """Node labels and hover texts for one layer (index = names, values = amounts)."""
+                    names = layer_totals.index.astype(str).str.replace('_', ' ').str.title()
+                    labels = names + '<br>' + fmt_amounts(layer_totals)
+                    if layer_total is not None:
+                        labels = labels + ' (' + (layer_totals / layer_total * 100).map('{:.0f}%'.format).to_numpy() + ')'
+                    hovers = names + '<br>Rp ' + layer_totals.map('{:,.0f}'.format).to_numpy()
+                    return list(labels), list(hovers)
                 
-                # Build links
-                sources = []
-                targets = []
-                values = []
-                link_colors = []
+                # Build nodes, layer by layer:
+                # 0 income sub-cats, 1 income cats, 2 account, 3 expense cats, 4 expense sub-cats
+                income_subcat_labels, income_subcat_hovers = layer_nodes(income_subcat_totals)
+                credit_labels, credit_hovers = layer_nodes(credit_by_cat, total_credit)
+                debit_labels, debit_hovers = layer_nodes(debit_by_cat, total_debit)
+                expense_subcat_labels, expense_subcat_hovers = layer_nodes(expense_subcat_totals)
                 
-                # Link: Income sub-cats → Income cats
-                for subcat, cat_amounts in income_subcat_data.items():
-                    for cat, amt in cat_amounts.items():
-                        sources.append(income_subcat_indices[subcat])
-                        targets.append(credit_cat_indices[cat])
-                        values.append(amt)
-                        link_colors.append("rgba(129, 199, 132, 0.4)")
+                credit_label, debit_label = fmt_amounts([total_credit, total_debit])
+                nodes = (
+                    income_subcat_labels + credit_labels
+                    + [f"Account<br>In: {credit_label}<br>Out: {debit_label}"]
+                    + debit_labels + expense_subcat_labels
+                )
+                hover_texts = (
+                    income_subcat_hovers + credit_hovers
+                    + [f"Account<br>Total In: Rp {total_credit:,.0f}<br>Total Out: Rp {total_debit:,.0f}"]
+                    + debit_hovers + expense_subcat_hovers
+                )
+                layer_sizes = [len(income_subcat_totals), len(credit_by_cat), 1, len(debit_by_cat), len(expense_subcat_totals)]
+                layer_colors = ["#81c784", "#66bb6a", "#90a4ae", "#ef5350", "#ffab91"]
+                node_colors = list(np.repeat(layer_colors, layer_sizes))
                 
-                # Link: Income cats → Account
-                for cat, amount in credit_by_cat.items():
-                    sources.append(credit_cat_indices[cat])
-                    targets.append(account_idx)
-                    values.append(amount)
-                    link_colors.append("rgba(102, 187, 106, 0.4)")
+                # Node index of each name, per layer
+                starts = np.cumsum([0] + layer_sizes)
+                income_subcat_idx = pd.Series(np.arange(starts[0], starts[1]), index=income_subcat_totals.index)
+                credit_cat_idx = pd.Series(np.arange(starts[1], starts[2]), index=credit_by_cat.index)
+                account_idx = starts[2]
+                debit_cat_idx = pd.Series(np.arange(starts[3], starts[4]), index=debit_by_cat.index)
+                expense_subcat_idx = pd.Series(np.arange(starts[4], starts[5]), index=expense_subcat_totals.index)
                 
-                # Link: Account → Expense cats
-                for cat, amount in debit_by_cat.items():
-                    sources.append(account_idx)
-                    targets.append(debit_cat_indices[cat])
-                    values.append(amount)
-                    link_colors.append("rgba(239, 83, 80, 0.4)")
+                # Build links from the (category, sub_category) totals; sub-category
+                # links are stable-sorted by sub-category node so each one's links stay together
+                if has_subcat:
+                    income_sub_src = income_subcat_idx.reindex(credit_totals.index.get_level_values(1)).to_numpy()
+                    income_sub_tgt = credit_cat_idx.reindex(credit_totals.index.get_level_values(0)).to_numpy()
+                    income_order = np.argsort(income_sub_src, kind='stable')
+                    expense_sub_src = debit_cat_idx.reindex(debit_totals.index.get_level_values(0)).to_numpy()
+                    expense_sub_tgt = expense_subcat_idx.reindex(debit_totals.index.get_level_values(1)).to_numpy()
+                    expense_order = np.argsort(expense_sub_tgt, kind='stable')
+                    income_sub_links = (income_sub_src[income_order], income_sub_tgt[income_order], credit_totals.to_numpy()[income_order])
+                    expense_sub_links = (expense_sub_src[expense_order], expense_sub_tgt[expense_order], debit_totals.to_numpy()[expense_order])
+                else:
+                    income_sub_links = expense_sub_links = ([], [], [])
                 
-                # Link: Expense cats → Expense sub-cats
-                for subcat, cat_amounts in expense_subcat_data.items():
-                    for cat, amt in cat_amounts.items():
-                        sources.append(debit_cat_indices[cat])
-                        targets.append(expense_subcat_indices[subcat])
-                        values.append(amt)
-                        link_colors.append("rgba(255, 171, 145, 0.5)")
+                link_groups = [
+                    # Income sub-cats → Income cats
+                    (*income_sub_links, "rgba(129, 199, 132, 0.4)"),
+                    # Income cats → Account
+                    (credit_cat_idx.to_numpy(), np.full(len(credit_by_cat), account_idx), credit_by_cat.to_numpy(), "rgba(102, 187, 106, 0.4)"),
+                    # Account → Expense cats
+                    (np.full(len(debit_by_cat), account_idx), debit_cat_idx.to_numpy(), debit_by_cat.to_numpy(), "rgba(239, 83, 80, 0.4)"),
+                    # Expense cats → Expense sub-cats
+                    (*expense_sub_links, "rgba(255, 171, 145, 0.5)"),
+                ]
+                sources = np.concatenate([group[0] for group in link_groups]).astype(int)
+                targets = np.concatenate([group[1] for group in link_groups]).astype(int)
+                values = np.concatenate([group[2] for group in link_groups]).astype(float)
+                link_colors = list(np.repeat([group[3] for group in link_groups], [len(group[2]) for group in link_groups]))
                 
-                if sources:
+                if len(sources):
                     # Calculate x positions for 5 layers
-                    has_income_subcat = bool(income_subcat_data)
-                    has_expense_subcat = bool(expense_subcat_data)
-                    
-                    x_positions = []
-                    # Income sub-cats at 0.0
-                    for _ in income_subcat_data:
-                        x_positions.append(0.0)
-                    # Income cats at 0.2 or 0.0
-                    for _ in credit_cats:
-                        x_positions.append(0.2 if has_income_subcat else 0.0)
-                    # Account at center
-                    x_positions.append(0.5)
-                    # Expense cats at 0.8 or 1.0
-                    for _ in debit_cats:
-                        x_positions.append(0.8 if has_expense_subcat else 1.0)
-                    # Expense sub-cats at 1.0
-                    for _ in expense_subcat_data:
-                        x_positions.append(1.0)
+                    has_income_subcat = len(income_subcat_totals) > 0
+                    has_expense_subcat = len(expense_subcat_totals) > 0
+                    x_positions = np.repeat(
+                        [0.0, 0.2 if has_income_subcat else 0.0, 0.5, 0.8 if has_expense_subcat else 1.0, 1.0],
+                        layer_sizes,
+                    )
                     
                     # Calculate spacing
-                    max_nodes = max(len(income_subcat_data), len(credit_cats), len(debit_cats), len(expense_subcat_data), 1)
+                    max_nodes = max(len(income_subcat_totals), len(credit_by_cat), len(debit_by_cat), len(expense_subcat_totals), 1)
                     pad_value = max(20, min(60, 120 // max_nodes))
                     chart_height = 500 + (max_nodes * 45)
                     
@@ -662,7 +779,7 @@ if uploaded_files:
                 
                 with col1:
                     st.markdown("**Outflow by Category (Debits)**")
-                    debit_df = df[df['type'] == 'debit'].groupby('category')['amount'].sum().reset_index()
+                    debit_df = df.loc[is_debit].groupby('category', observed=True)['amount'].sum().reset_index()
                     if not debit_df.empty:
                         fig_debit = px.pie(
                             debit_df, 
@@ -677,7 +794,7 @@ if uploaded_files:
                 
                 with col2:
                     st.markdown("**Inflow by Category (Credits)**")
-                    credit_df = df[df['type'] == 'credit'].groupby('category')['amount'].sum().reset_index()
+                    credit_df = df.loc[is_credit].groupby('category', observed=True)['amount'].sum().reset_index()
                     if not credit_df.empty:
                         fig_credit = px.pie(
                             credit_df, 
@@ -692,7 +809,7 @@ if uploaded_files:
                 
                 # Bar chart of all categories
                 st.markdown("**Transaction Count by Category**")
-                cat_counts = df.groupby(['category', 'type']).size().reset_index(name='count')
+                cat_counts = df.groupby(['category', 'type'], observed=True).size().reset_index(name='count')
                 fig_bar = px.bar(
                     cat_counts,
                     x='category',
@@ -709,7 +826,7 @@ if uploaded_files:
                 st.markdown("**Daily Transaction Volume**")
                 
                 # Aggregate by date
-                daily_df = df.groupby(['date', 'type'])['amount'].sum().reset_index()
+                daily_df, df_sorted = timeline_frames(df[['date', 'time', 'type', 'amount']])
                 
                 fig_timeline = px.bar(
                     daily_df,
@@ -725,12 +842,6 @@ if uploaded_files:
                 
                 # Running balance chart
                 st.markdown("**Running Balance**")
-                df_sorted = df.sort_values(['date', 'time'])
-                df_sorted['flow'] = df_sorted.apply(
-                    lambda x: x['amount'] if x['type'] == 'credit' else -x['amount'], 
-                    axis=1
-                )
-                df_sorted['cumulative'] = df_sorted['flow'].cumsum()
                 
                 fig_balance = px.line(
                     df_sorted,
@@ -743,7 +854,7 @@ if uploaded_files:
                 fig_balance.update_layout(height=400, **plotly_theme)
                 st.plotly_chart(fig_balance, use_container_width=True)
         
-        except ImportError:
+        else:
             st.warning("📊 Install plotly for visualizations: `pip install plotly`")
         
         # Data table with editable sub_category
@@ -755,8 +866,7 @@ if uploaded_files:
         filter_col1, filter_col2, filter_col3 = st.columns(3)
         
         with filter_col1:
-            type_options = ['All', 'credit', 'debit']
-            selected_type = st.selectbox("Transaction Type", type_options, index=0)
+            selected_type = st.selectbox("Transaction Type", TYPE_OPTIONS, index=0)
         
         with filter_col2:
             category_list = ['All'] + sorted(df['category'].dropna().unique().tolist())
@@ -771,37 +881,28 @@ if uploaded_files:
                 subcat_list = ['All']
             selected_subcat = st.selectbox("Sub-Category", subcat_list, index=0)
         
-        # Apply filters
-        filtered_df = df.copy()
+        # Apply filters as one combined mask, selecting rows once
+        mask = np.ones(len(df), dtype=bool)
         if selected_type != 'All':
-            filtered_df = filtered_df[filtered_df['type'] == selected_type]
+            mask &= df['type'].eq(selected_type).to_numpy()
         if selected_category != 'All':
-            filtered_df = filtered_df[filtered_df['category'] == selected_category]
+            mask &= df['category'].eq(selected_category).to_numpy()
         if selected_subcat == '(Empty)':
-            filtered_df = filtered_df[(filtered_df['sub_category'] == '') | (filtered_df['sub_category'].isna())]
+            sub_categories = df['sub_category'].to_numpy()
+            mask &= pd.isna(sub_categories) | (sub_categories == '')
         elif selected_subcat != 'All':
-            filtered_df = filtered_df[filtered_df['sub_category'] == selected_subcat]
+            mask &= df['sub_category'].eq(selected_subcat).to_numpy()
+        # No active filter: hand the frame on as is (the editor copies its input)
+        filtered_df = df if mask.all() else df[mask]
         
         # Show filter stats
         st.caption(f"Showing {len(filtered_df)} of {len(df)} transactions")
         
-        # Available sub-categories for dropdown (combined income + spending)
-        income_subcategories = [
-            'salary', 'business_income', 'freelance', 'investment_return', 
-            'refund', 'gift_received', 'family_support', 'loan_received', 'sale'
-        ]
-        spending_subcategories = [
-            'groceries', 'dining', 'food_delivery', 'coffee',
-            'electricity', 'water', 'internet', 'phone', 'insurance', 'subscription',
-            'ride_hailing', 'fuel', 'transport', 'travel', 'parking',
-            'online_shopping', 'shopping', 'fashion', 'electronics',
-            'ewallet_topup', 'games', 'entertainment',
-            'healthcare', 'education', 'charity',
-            'rent', 'loan_payment', 'credit_card', 'investment', 'savings',
-            'family_support', 'friend', 'gift_given',
-            'admin_fee', 'transfer_fee'
-        ]
-        subcategory_options = [''] + sorted(set(income_subcategories + spending_subcategories))
+        # Nothing to edit or export; stopping here also keeps an empty
+        # editor result from replacing the parsed data below
+        if filtered_df.empty:
+            st.info("No transactions match the selected filters")
+            st.stop()
         
         # Editable table using Streamlit's native data_editor
         edited_df = st.data_editor(
@@ -810,7 +911,7 @@ if uploaded_files:
                 "type": st.column_config.TextColumn("Type"),
                 "sub_category": st.column_config.SelectboxColumn(
                     "Sub Category",
-                    options=subcategory_options,
+                    options=SUBCATEGORY_OPTIONS,
                     help="Select a sub-category"
                 ),
                 "amount": st.column_config.NumberColumn("Amount", format="Rp %.0f"),
@@ -856,67 +957,61 @@ if uploaded_files:
             )
         
         with dcol2:
-            buffer = io.BytesIO()
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                # Summary sheet
-                first_info = all_account_info[0] if all_account_info else {}
-                summary_data = {
-                    'Metric': [
-                        'Bank',
-                        'Account Number',
-                        'Account Name',
-                        '',
-                        'Total Files Processed',
-                        'Total Transactions',
-                        'Total Credits',
-                        'Total Debits',
-                        'Net Flow',
-                        '',
-                        'Credit Transactions',
-                        'Debit Transactions',
-                    ],
-                    'Value': [
-                        first_info.get('bank', ''),
-                        first_info.get('account_number', ''),
-                        first_info.get('account_name', ''),
-                        '',
-                        len(all_account_info),
-                        len(df),
-                        f"Rp {credits:,.0f}",
-                        f"Rp {debits:,.0f}",
-                        f"Rp {net:,.0f}",
-                        '',
-                        len(df[df['type'] == 'credit']),
-                        len(df[df['type'] == 'debit']),
-                    ]
-                }
-                pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', index=False)
-                
-                # Files processed
-                pd.DataFrame(all_account_info).to_excel(writer, sheet_name='Files', index=False)
-                
-                # Category breakdown (using edited data)
-                category_counts = edited_df.groupby('category').agg({
-                    'amount': ['count', 'sum']
-                }).reset_index()
-                category_counts.columns = ['Category', 'Count', 'Total Amount']
-                category_counts.to_excel(writer, sheet_name='By Category', index=False)
-                
-                # Transactions (with sub_category edits)
-                edited_df.to_excel(writer, sheet_name='Transactions', index=False)
+            # Summary sheet rows
+            first_info = all_account_info[0] if all_account_info else {}
+            summary_data = {
+                'Metric': [
+                    'Bank',
+                    'Account Number',
+                    'Account Name',
+                    '',
+                    'Total Files Processed',
+                    'Total Transactions',
+                    'Total Credits',
+                    'Total Debits',
+                    'Net Flow',
+                    '',
+                    'Credit Transactions',
+                    'Debit Transactions',
+                ],
+                'Value': [
+                    first_info.get('bank', ''),
+                    first_info.get('account_number', ''),
+                    first_info.get('account_name', ''),
+                    '',
+                    len(all_account_info),
+                    len(df),
+                    float(credits),
+                    float(debits),
+                    float(net),
+                    '',
+                    int(is_credit.sum()),
+                    int(is_debit.sum()),
+                ]
+            }
             
-            st.download_button(
-                "📥 Excel",
-                buffer.getvalue(),
-                file_name=f"{filename_base}_transactions.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
+            # The workbook is only built once asked for; after that it follows
+            # edits (rebuilt via the excel_report cache when the data changes)
+            if not st.session_state.get('excel_requested'):
+                if st.button("📊 Prepare Excel", use_container_width=True):
+                    st.session_state.excel_requested = True
+                    st.rerun()
+            else:
+                st.download_button(
+                    "📥 Excel",
+                    excel_report(summary_data, all_account_info, edited_df),
+                    file_name=f"{filename_base}_transactions.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True
+                )
 
 else:
     # Clear session state
     st.session_state.parsed_data = None
     st.session_state.all_account_info = []
+    st.session_state.parse_fp = None
+    st.session_state.parse_result = None
+    st.session_state.excel_requested = False
     
     st.info("👆 Upload PDF bank statements to get started (max 10 files)")
     